@@ -0,0 +1,127 @@
+"""Compare downloading the tests and then counting their words, one step after
+the other as downloadtests and makelists do, with the overlapped pipeline
+command, against a local server with a configurable latency and bandwidth.
+
+    python benchmarks/bench_pipeline.py --grades 3 --years 2 --jobs 4
+"""
+
+# standard library imports
+from pathlib import Path
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import sys
+import tempfile
+import threading
+import time
+
+# third party imports
+import typer
+
+sys.path.insert(0, str(Path(__file__).parent.parent.resolve() / "eikenvocab"))
+
+# local imports
+import pipeline
+import tests
+import wordlists
+from suite import make_corpus
+
+GRADES = ["5", "4", "3", "p2", "2", "p1", "1"]
+
+
+def serve(pdfs: list[bytes], latency: float, bandwidth: float) -> ThreadingHTTPServer:
+    """Serve a synthetic PDF for every path, slowly, like the Eiken site."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            pdf = pdfs[sum(self.path.encode("utf-8")) % len(pdfs)]
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(pdf)))
+            self.end_headers()
+            chunk_size = 16 * 1024
+            for start in range(0, len(pdf), chunk_size):
+                self.wfile.write(pdf[start : start + chunk_size])
+                time.sleep(chunk_size / bandwidth)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_sequential(grades, path, years, workers, jobs, base_url) -> dict[str, Counter]:
+    tests.scrape_eiken_tests(
+        grades=grades, path=path, years=years, workers=workers, base_url=base_url
+    )
+    return {
+        grade: wordlists.count_words(
+            text
+            for _, text in wordlists.iter_pdf_texts(
+                input_path=Path(path) / f"grade_{grade}", jobs=jobs
+            )
+        )
+        for grade in grades
+    }
+
+
+def run_pipeline(grades, path, years, workers, jobs, base_url) -> dict[str, Counter]:
+    return pipeline.download_and_count(
+        grades=grades,
+        path=path,
+        years=years,
+        workers=workers,
+        jobs=jobs,
+        base_url=base_url,
+    )
+
+
+def main(
+    grades: int = typer.Option(3, "--grades", help="The number of grades."),
+    years: int = typer.Option(2, "--years", help="The number of years of tests."),
+    pages: int = typer.Option(12, "--pages", help="The number of pages per PDF."),
+    workers: int = typer.Option(4, "--workers", help="Downloads at once."),
+    jobs: int = typer.Option(4, "--jobs", help="Processes to extract with."),
+    latency: float = typer.Option(
+        0.2, "--latency", help="Seconds before each response."
+    ),
+    bandwidth: float = typer.Option(
+        2e6, "--bandwidth", help="Bytes per second of each download."
+    ),
+):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        make_corpus(Path(tmpdir) / "corpus", 4, pages, 400, seed=0)
+        pdfs = [
+            file.read_bytes() for file in sorted(Path(tmpdir, "corpus").glob("*.pdf"))
+        ]
+        server = serve(pdfs, latency, bandwidth)
+        base_url = f"http://127.0.0.1:{server.server_port}"
+        options = dict(
+            grades=GRADES[:grades],
+            years=range(2021, 2021 - years, -1),
+            workers=workers,
+            jobs=jobs,
+            base_url=base_url,
+        )
+        timings = {}
+        results = {}
+        for name, run in (("sequential", run_sequential), ("pipeline", run_pipeline)):
+            start = time.perf_counter()
+            results[name] = run(path=Path(tmpdir) / name, **options)
+            timings[name] = time.perf_counter() - start
+        server.shutdown()
+
+    files = grades * years * 3 * 2
+    print(f"{files} PDFs of {pages} pages")
+    print(f"download, then extract and count: {timings['sequential']:8.3f} s")
+    print(f"overlapped pipeline:              {timings['pipeline']:8.3f} s")
+    print(
+        f"speedup:                          {timings['sequential'] / timings['pipeline']:8.2f}x"
+    )
+    if results["sequential"] != results["pipeline"]:
+        print("Warning: the word counts differ.")
+
+
+if __name__ == "__main__":
+    typer.run(main)
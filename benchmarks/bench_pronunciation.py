@@ -0,0 +1,111 @@
+"""Compare the offline PronunciationEngine with the usual katakana of a list of
+common loanwords, and with the freeenglish.jp scrape: throughput of each, and how
+often they agree, on the most frequent words of a grade.
+
+    python benchmarks/bench_pronunciation.py --grade 3 --sample 200
+"""
+
+# standard library imports
+from pathlib import Path
+import sys
+import time
+
+# third party imports
+import typer
+
+sys.path.insert(0, str(Path(__file__).parent.parent.resolve() / "eikenvocab"))
+
+# local imports
+import pronunciation
+import textcache
+import wordlists
+
+LOANWORDS = Path(__file__).parent.resolve() / "loanwords.tsv"
+
+
+def read_loanwords(filename: Path) -> dict[str, str]:
+    loanwords = {}
+    with open(filename, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].split()
+            if len(line) == 2:
+                loanwords[line[0]] = line[1]
+    return loanwords
+
+
+def compare_loanwords(engine: pronunciation.PronunciationEngine, filename: Path):
+    loanwords = read_loanwords(filename)
+    converted = {word: engine.convert(word) for word in loanwords}
+    agreed = [word for word, kana in loanwords.items() if converted[word] == kana]
+    print(
+        f"loanwords:        {len(agreed)}/{len(loanwords)} "
+        f"({len(agreed) / max(len(loanwords), 1):.0%}) written as usual"
+    )
+    for word, kana in loanwords.items():
+        if converted[word] != kana:
+            print(f"  {word}: {converted[word]} (offline) / {kana} (usual)")
+
+
+def main(
+    grade: str = typer.Option("3", "--grade", "-g", help="The grade to sample."),
+    datapath: str = typer.Option(
+        Path(__file__).parent.parent.resolve() / "data",
+        "--datapath",
+        "-d",
+        help="The path where the source PDFs are located.",
+    ),
+    sample: int = typer.Option(
+        200, "--sample", "-n", help="The number of words to compare."
+    ),
+    loanwords: str = typer.Option(
+        LOANWORDS,
+        "--loanwords",
+        help="A list of loanwords and their usual katakana to compare with.",
+    ),
+):
+    compare_loanwords(pronunciation.PronunciationEngine(), Path(loanwords))
+
+    input_path = Path(datapath) / f"grade_{grade}"
+    counts = wordlists.count_words(
+        text
+        for _, text in wordlists.iter_pdf_texts(
+            input_path=input_path, cache=textcache.TextCache()
+        )
+    )
+    counts = wordlists.clean_word_counts(counts)
+    words = [word for word, _ in wordlists.get_most_frequent_words(counts, sample)]
+
+    engine = pronunciation.PronunciationEngine()
+    start = time.perf_counter()
+    engine.index
+    load_time = time.perf_counter() - start
+    start = time.perf_counter()
+    offline = {word: engine.convert(word) for word in words}
+    offline_time = time.perf_counter() - start
+
+    session = wordlists.get_katakana_session()
+    start = time.perf_counter()
+    web = {word: wordlists.english_to_katakana(word, session=session) for word in words}
+    web_time = time.perf_counter() - start
+
+    covered = [word for word in words if offline[word] is not None]
+    agreed = [word for word in covered if offline[word] == web[word]]
+    print(f"Grade {grade}: {len(words)} words")
+    print(f"dictionary load:  {load_time:8.3f} s (once per run)")
+    print(
+        f"offline engine:   {offline_time:8.3f} s "
+        f"({len(words) / offline_time:,.0f} words/s)"
+    )
+    print(f"freeenglish.jp:   {web_time:8.3f} s ({len(words) / web_time:,.1f} words/s)")
+    print(f"in dictionary:    {len(covered)}/{len(words)}")
+    print(
+        f"agreement:        {len(agreed)}/{len(covered)} "
+        f"({len(agreed) / max(len(covered), 1):.0%})"
+    )
+    for word in covered:
+        if offline[word] != web[word]:
+            print(f"  {word}: {offline[word]} (offline) / {web[word]} (web)")
+
+
+if __name__ == "__main__":
+    typer.run(main)
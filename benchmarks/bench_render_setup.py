@@ -0,0 +1,75 @@
+"""Measure how much render setup time the shared Renderer saves per grade,
+compared with building a jinja2 environment and letting WeasyPrint parse
+the stylesheets and fonts again for every grade.
+
+    python benchmarks/bench_render_setup.py --grades 7 --cards 8
+"""
+
+# standard library imports
+from pathlib import Path
+import sys
+import time
+
+# third party imports
+import jinja2
+import typer
+from weasyprint import HTML
+
+sys.path.insert(0, str(Path(__file__).parent.parent.resolve() / "eikenvocab"))
+
+# local imports
+import flashcards
+
+PACKAGE_PATH = Path(__file__).parent.parent.resolve() / "eikenvocab"
+
+
+def sample_wordlist(cards: int) -> list[tuple[dict, dict]]:
+    data = [["Word", "Pronunciation (hiragana)", "Translation (hiragana)"]]
+    data += [[f"word{i}", "わーど", "たんご"] for i in range(cards)]
+    return flashcards.make_paired_wordlist(flashcards.make_wordlist(data))
+
+
+def render_cold(wordlist: list[tuple[dict, dict]]) -> bytes:
+    """Render the way it was done before Renderer: everything set up per grade."""
+    template_env = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(searchpath=str(PACKAGE_PATH / "templates"))
+    )
+    template = template_env.get_template("cards.html")
+    content = template.render(
+        static_path=PACKAGE_PATH / "static", grade="5", wordlist=wordlist
+    )
+    return HTML(string=content).write_pdf()
+
+
+def render_warm(renderer: flashcards.Renderer, wordlist: list[tuple[dict, dict]]):
+    return renderer.write_pdf(renderer.render_template("5", wordlist))
+
+
+def main(
+    grades: int = typer.Option(7, "--grades", help="The number of grades to render."),
+    cards: int = typer.Option(8, "--cards", help="The number of cards per grade."),
+):
+    wordlist = sample_wordlist(cards)
+
+    start = time.perf_counter()
+    for _ in range(grades):
+        render_cold(wordlist)
+    cold_time = (time.perf_counter() - start) / grades
+
+    start = time.perf_counter()
+    renderer = flashcards.Renderer()
+    setup_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(grades):
+        render_warm(renderer, wordlist)
+    warm_time = (time.perf_counter() - start) / grades
+
+    print(f"{grades} grades of {cards} cards")
+    print(f"per grade, set up every time:  {cold_time:8.3f} s")
+    print(f"renderer setup, once per run:  {setup_time:8.3f} s")
+    print(f"per grade, shared renderer:    {warm_time:8.3f} s")
+    print(f"saved per grade:               {cold_time - warm_time:8.3f} s")
+
+
+if __name__ == "__main__":
+    typer.run(main)
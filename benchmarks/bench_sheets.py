@@ -0,0 +1,200 @@
+"""Write the worksheets of several grades to a local fake of the Sheets and Drive
+APIs which enforces a per-minute quota like Google's, answering 429 Too Many
+Requests beyond it, once with every request sent straight away, as before the
+shared client, and once through the QuotaScheduler.
+
+    python benchmarks/bench_sheets.py --grades 7 --quota 10 --window 6
+
+The fake quota is --quota requests of each kind per --window seconds, so a short
+window stands in for a minute without the benchmark taking minutes.
+"""
+
+# standard library imports
+from pathlib import Path
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import re
+import sys
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+# third party imports
+import typer
+
+sys.path.insert(0, str(Path(__file__).parent.parent.resolve() / "eikenvocab"))
+
+# local imports
+import googleapi
+import wordlists
+from wordtable import WordTable
+
+GRADES = ["5", "4", "3", "p2", "2", "p1", "1"]
+
+
+class FakeSheetsAPI:
+    """Just enough of the Sheets and Drive APIs for wordlists.write_gsheet(), with
+    a quota on each kind of request over a sliding window."""
+
+    def __init__(self, quota: int, window: float, latency: float):
+        self.quota = quota
+        self.window = window
+        self.latency = latency
+        self.requests = defaultdict(deque)
+        self.counts = defaultdict(int)
+        self.rejected = 0
+        self.sheets = []
+        self.lock = threading.Lock()
+
+    def allow(self, kind: str) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            recent = self.requests[kind]
+            while recent and recent[0] <= now - self.window:
+                recent.popleft()
+            self.counts[kind] += 1
+            if len(recent) >= self.quota:
+                self.rejected += 1
+                return False
+            recent.append(now)
+            return True
+
+    def handle(
+        self, method: str, path: str, query: dict, body: dict
+    ) -> tuple[int, dict]:
+        time.sleep(self.latency)
+        kind = googleapi.QuotaScheduler.kind(method, path)
+        if not self.allow(kind):
+            error = {
+                "code": 429,
+                "message": "Quota exceeded",
+                "status": "RESOURCE_EXHAUSTED",
+            }
+            return 429, {"error": error}
+        if path.startswith("/drive/v3/files"):
+            name = re.search(r'name = "(.*)"', query.get("q", [""])[0]).group(1)
+            return 200, {"files": [{"id": "fake", "name": name}]}
+        if path.endswith(":batchUpdate"):
+            replies = []
+            for request in body["requests"]:
+                if "addSheet" in request:
+                    with self.lock:
+                        properties = dict(
+                            request["addSheet"]["properties"],
+                            sheetId=len(self.sheets) + 1,
+                        )
+                        self.sheets.append({"properties": properties})
+                    replies.append({"addSheet": {"properties": properties}})
+                else:
+                    replies.append({})
+            return 200, {"spreadsheetId": "fake", "replies": replies}
+        if path == "/v4/spreadsheets/fake":
+            return 200, {"spreadsheetId": "fake", "sheets": self.sheets}
+        if "/values/" in path:
+            return 200, {
+                "spreadsheetId": "fake",
+                "updatedRows": len(body.get("values", [])),
+            }
+        return 404, {"error": {"code": 404, "message": path, "status": "NOT_FOUND"}}
+
+
+def serve(api: FakeSheetsAPI) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def respond(self):
+            url = urlparse(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            status, reply = api.handle(
+                self.command, url.path, parse_qs(url.query), body
+            )
+            data = json.dumps(reply).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = do_POST = do_PUT = respond
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_table(words: int) -> WordTable:
+    return WordTable(
+        {
+            "Word": [f"word{index}" for index in range(words)],
+            "Frequency": list(range(words, 0, -1)),
+            "Translation (hiragana)": ["たんご"] * words,
+        }
+    )
+
+
+def run(
+    name: str,
+    scheduler: googleapi.QuotaScheduler,
+    grades,
+    words,
+    quota,
+    window,
+    latency,
+):
+    api = FakeSheetsAPI(quota, window, latency)
+    server = serve(api)
+    endpoint = f"http://127.0.0.1:{server.server_port}"
+    googleapi.set_client(
+        googleapi.ScheduledClient(scheduler=scheduler, endpoint=endpoint)
+    )
+    failed = []
+    start = time.perf_counter()
+    for grade in grades:
+        try:
+            wordlists.write_gsheet(make_table(words), grade=grade)
+        except Exception as error:
+            print(f"Grade {grade} failed: {error!r}")
+            failed.append(grade)
+    elapsed = time.perf_counter() - start
+    googleapi.set_client(None)
+    server.shutdown()
+    print(
+        f"{name}: {elapsed:.2f} s, {len(grades) - len(failed)} of {len(grades)} grades "
+        f"written, {sum(api.counts.values())} requests, {api.rejected} rejected with 429"
+    )
+
+
+def main(
+    grades: int = typer.Option(7, "--grades", help="The number of grades to write."),
+    words: int = typer.Option(500, "--words", help="The words per grade."),
+    quota: int = typer.Option(
+        10, "--quota", help="Requests of each kind allowed per window."
+    ),
+    window: float = typer.Option(
+        6, "--window", help="The length of the quota window, in seconds."
+    ),
+    latency: float = typer.Option(
+        0.05, "--latency", help="Seconds each request takes."
+    ),
+):
+    grades = GRADES[:grades]
+    unscheduled = googleapi.QuotaScheduler(
+        quotas={kind: 10**6 for kind in googleapi.QUOTAS}, burst=10**6, retries=0
+    )
+    scheduled = googleapi.QuotaScheduler(
+        quotas={kind: quota for kind in googleapi.QUOTAS},
+        window=window,
+        burst=max(1, quota // 3),
+        backoff=window / 4,
+        max_backoff=window,
+    )
+    for name, scheduler in (("unscheduled", unscheduled), ("scheduled", scheduled)):
+        run(name, scheduler, grades, words, quota, window, latency)
+        print(scheduler.report())
+
+
+if __name__ == "__main__":
+    typer.run(main)
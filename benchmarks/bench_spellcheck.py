@@ -0,0 +1,77 @@
+"""Compare the old per-occurrence spellcheck with the memoized SpellcheckIndex
+on the words of a full grade of test PDFs.
+
+    python benchmarks/bench_spellcheck.py --grade 3
+"""
+
+# standard library imports
+from pathlib import Path
+import sys
+import tempfile
+import time
+
+# third party imports
+import enchant
+import typer
+
+sys.path.insert(0, str(Path(__file__).parent.parent.resolve() / "eikenvocab"))
+
+# local imports
+import spellcheck
+import textcache
+import wordlists
+
+
+def per_occurrence_filter(words: list[str]) -> list[str]:
+    """The spellcheck filter as it was before SpellcheckIndex, for comparison."""
+    dictionaries = [enchant.Dict(variant) for variant in spellcheck.DEFAULT_VARIANTS]
+    return [
+        word
+        for word in words
+        if any(dictionary.check(word) for dictionary in dictionaries)
+    ]
+
+
+def timed(function, *args) -> tuple[float, list]:
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def main(
+    grade: str = typer.Option("3", "--grade", "-g", help="The grade to benchmark."),
+    datapath: str = typer.Option(
+        Path(__file__).parent.parent.resolve() / "data",
+        "--datapath",
+        "-d",
+        help="The path where the source PDFs are located.",
+    ),
+):
+    input_path = Path(datapath) / f"grade_{grade}"
+    text = wordlists.pdfs_to_string(input_path=input_path, cache=textcache.TextCache())
+    words = wordlists.remove_single_character_elements(wordlists.string_to_words(text))
+    distinct = list(dict.fromkeys(words))
+    print(f"Grade {grade}: {len(words)} words, {len(distinct)} distinct.")
+
+    baseline_time, expected = timed(per_occurrence_filter, words)
+    print(f"per occurrence, 5 dictionaries: {baseline_time:8.3f} s")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        lexicon_path = Path(tmpdir) / "lexicon.json"
+        index = spellcheck.SpellcheckIndex(lexicon_path=lexicon_path)
+        cold_time, result = timed(index.filter, words)
+        assert result == expected
+        print(f"index, cold:                    {cold_time:8.3f} s")
+        warm_time, result = timed(index.filter, words)
+        assert result == expected
+        print(f"index, memoized (next grade):   {warm_time:8.3f} s")
+        index.save()
+        index = spellcheck.SpellcheckIndex(lexicon_path=lexicon_path)
+        lexicon_time, result = timed(index.filter, words)
+        assert result == expected
+        print(f"index, from lexicon (next run): {lexicon_time:8.3f} s")
+    print(f"Speedup, cold: {baseline_time / cold_time:.1f}x")
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,130 @@
+"""Compare the time and memory of preparing a wordlist for the flashcards as a
+list of dictionaries, the way flashcards.make_wordlist() and replace_all_blanks()
+used to, with the columnar WordTable, and time saving and loading a table.
+
+    python benchmarks/bench_wordtable.py --words 10000
+"""
+
+# standard library imports
+from pathlib import Path
+import copy
+import random
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# third party imports
+import typer
+
+sys.path.insert(0, str(Path(__file__).parent.parent.resolve() / "eikenvocab"))
+
+# local imports
+from wordtable import WordTable
+
+HEADER = [
+    "Word",
+    "Frequency",
+    "Pronunciation (katakana)",
+    "Pronunciation (hiragana)",
+    "Translation (kanji)",
+    "Translation (hiragana)",
+]
+
+
+def make_values(words: int, seed: int = 0) -> list[list[str]]:
+    """Make the contents of a worksheet, as flashcards.get_data_for_grade() returns them."""
+    rng = random.Random(seed)
+    kana = [chr(code) for code in range(ord("ぁ"), ord("ゖ"))]
+    values = [list(HEADER)]
+    for index in range(words):
+        word = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(7))
+        reading = "".join(rng.choice(kana) for _ in range(5))
+        # some translations have a blank to fill in, e.g. "(__を)見る"
+        blank = "__を" if index % 10 == 0 else ""
+        values.append(
+            [word, str(rng.randint(1, 500)), reading, reading, blank + "見る", reading]
+        )
+    return values
+
+
+def dict_path(values: list[list[str]]) -> list[dict]:
+    """The flashcards' wordlist as it was before WordTable, for comparison."""
+    wordlist = []
+    keys = values[0]
+    keys.insert(0, "ID")
+    for count, word in enumerate(values[1:], start=1):
+        word.insert(0, count)
+        wordlist.append(dict(zip(keys, word)))
+    for worddict in wordlist:
+        for key, value in worddict.items():
+            if isinstance(value, str):
+                worddict[key] = re.sub(
+                    "([_])\\w+", '<span class="blank">____</span>', value
+                )
+    return wordlist
+
+
+def table_path(values: list[list[str]]) -> WordTable:
+    return WordTable.from_values(values).with_ids().replace_blanks()
+
+
+def records_path(values: list[list[str]]) -> list[dict]:
+    """As render_grade() does it, with a dictionary per word for the template."""
+    return table_path(values).records()
+
+
+def measure(function, values: list[list[str]]) -> tuple[float, int, int, object]:
+    """Time a function, and measure its peak memory and the memory its result keeps."""
+    values = copy.deepcopy(values)
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(values)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, current, peak, result
+
+
+def main(
+    words: int = typer.Option(10000, "--words", help="The number of words."),
+    repeat: int = typer.Option(5, "--repeat", help="Take the best of this many runs."),
+):
+    values = make_values(words)
+    results = {}
+    for name, function in (
+        ("list of dicts", dict_path),
+        ("WordTable", table_path),
+        ("+ records()", records_path),
+    ):
+        runs = [measure(function, values) for _ in range(repeat)]
+        elapsed = min(run[0] for run in runs)
+        _, current, peak, result = runs[0]
+        results[name] = result
+        print(
+            f"{name:14} {elapsed * 1000:8.1f} ms  "
+            f"kept {current / 2**20:6.2f} MiB  peak {peak / 2**20:6.2f} MiB"
+        )
+    if results["list of dicts"] != results["+ records()"]:
+        print("Warning: the wordlists differ.")
+
+    table = WordTable.from_values(values)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = Path(tmpdir) / "grade.wordtable"
+        start = time.perf_counter()
+        table.save(filename)
+        saved = time.perf_counter() - start
+        start = time.perf_counter()
+        loaded = WordTable.load(filename)
+        load_time = time.perf_counter() - start
+        size = filename.stat().st_size
+    assert loaded == table
+    print(
+        f"save {saved * 1000:.1f} ms, load {load_time * 1000:.1f} ms, "
+        f"{size / 2**20:.2f} MiB on disk for {words} words"
+    )
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,339 @@
+"""Time every stage of makelists and makecards on a synthetic corpus, with the
+network services replaced by local fakes of configurable latency, so that
+changes can be compared run to run.
+
+    python benchmarks/suite.py --pdfs 10 --pages 8 --output results.json
+    python benchmarks/suite.py --baseline results.json
+
+Each stage is run --repeat times and its median time is reported, along with
+the startup time of the CLI (a fresh interpreter running --help). With
+--baseline, stages slower than the baseline by more than --tolerance are
+listed as regressions and the exit code is 1.
+"""
+
+# standard library imports
+from pathlib import Path
+from contextlib import ExitStack
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Optional
+from unittest import mock
+
+# third party imports
+import fitz
+import typer
+
+sys.path.insert(0, str(Path(__file__).parent.parent.resolve() / "eikenvocab"))
+
+# local imports
+import flashcards
+import googleapi
+import pronunciation
+import spellcheck
+import wordlists
+
+STAGES = [
+    "pdfs_to_string",
+    "string_to_words",
+    "clean_wordlist",
+    "get_most_frequent_words",
+    "make_wordlist",
+    "write_gsheet",
+    "render_template",
+    "render_pdf",
+    "end_to_end",
+    "startup",
+]
+
+
+def make_corpus(
+    path: Path, pdfs: int, pages: int, words_per_page: int, seed: int
+) -> int:
+    """Write synthetic test PDFs, with words drawn from the pronunciation dictionary
+    by a Zipf-like distribution and a few misspellings mixed in.
+
+    Returns:
+        int: The number of words written.
+    """
+    rng = random.Random(seed)
+    vocabulary = sorted(
+        word for word in pronunciation.get_engine().index if word.isalpha()
+    )
+    rng.shuffle(vocabulary)
+    vocabulary = vocabulary[:5000]
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    written = 0
+    path.mkdir(parents=True, exist_ok=True)
+    for number in range(pdfs):
+        document = fitz.open()
+        # the first and last pages are dropped when extracting, like the real tests
+        for page_number in range(pages + 2):
+            page = document.new_page()
+            if page_number in (0, pages + 1):
+                page.insert_text((72, 72), "Eiken Test")
+                continue
+            words = rng.choices(vocabulary, weights=weights, k=words_per_page)
+            words += ["".join(rng.choices("xqzj", k=5)) for _ in range(3)]
+            page.insert_textbox(
+                fitz.Rect(36, 36, 560, 800), " ".join(words), fontsize=7
+            )
+            written += len(words)
+        document.save(str(path / f"test_{number:03}.pdf"))
+        document.close()
+    return written
+
+
+class FakeTranslateClient:
+    """Stands in for the Google Translate client."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def translate(self, values, target_language="ja", source_language=None):
+        time.sleep(self.latency)
+        if isinstance(values, str):
+            return {"translatedText": "単語"}
+        return [{"translatedText": "単語"} for _ in values]
+
+
+class FakeWorksheet:
+    """Stands in for a gspread worksheet."""
+
+    def __init__(self, title: str, rows: int, cols: int, latency: float):
+        self.title = title
+        self.id = id(self)
+        self.row_count = rows
+        self.col_count = cols
+        self.latency = latency
+        self.values = []
+
+    def update(self, range_name, values):
+        time.sleep(self.latency)
+        self.values = values
+
+    def get_all_values(self):
+        time.sleep(self.latency)
+        return self.values
+
+    def batch_update(self, ranges):
+        time.sleep(self.latency)
+
+    def resize(self, rows=None, cols=None):
+        time.sleep(self.latency)
+
+    def format(self, range_name, cell_format):
+        time.sleep(self.latency)
+
+    def freeze(self, rows=None, cols=None):
+        time.sleep(self.latency)
+
+
+class FakeSpreadsheet:
+    """Stands in for a gspread spreadsheet, and the client that opens it."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.sheets = []
+
+    def open(self, title):
+        time.sleep(self.latency)
+        return self
+
+    def worksheets(self):
+        return list(self.sheets)
+
+    def worksheet(self, title):
+        time.sleep(self.latency)
+        for sheet in self.sheets:
+            if sheet.title == title:
+                return sheet
+        raise wordlists.gspread.exceptions.WorksheetNotFound(title)
+
+    def add_worksheet(self, title, rows, cols, index=None):
+        time.sleep(self.latency)
+        self.sheets = [sheet for sheet in self.sheets if sheet.title != title]
+        sheet = FakeWorksheet(title, rows, cols, self.latency)
+        self.sheets.insert(index or 0, sheet)
+        return sheet
+
+    def batch_update(self, body):
+        time.sleep(self.latency)
+
+
+def fake_services(latency: float, spreadsheet: FakeSpreadsheet) -> ExitStack:
+    """Replace the network-backed services used by wordlists with local fakes."""
+
+    def fake_katakana(word, session=None):
+        time.sleep(latency)
+        return "ワード"
+
+    stack = ExitStack()
+    stack.enter_context(
+        mock.patch.object(wordlists, "english_to_katakana", fake_katakana)
+    )
+    stack.enter_context(
+        mock.patch.object(wordlists, "_translate_client", FakeTranslateClient(latency))
+    )
+    googleapi.set_client(spreadsheet)
+    stack.callback(googleapi.set_client, None)
+    return stack
+
+
+def run_once(
+    corpus: Path, output: Path, wordlimit: int, workers: int, latency: float
+) -> dict[str, float]:
+    """Run the whole pipeline once, timing each stage.
+
+    Returns:
+        dict[str, float]: The time each stage took, in seconds.
+    """
+    timings = {}
+
+    def timed(stage, function, *args, **kwargs):
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        timings[stage] = time.perf_counter() - start
+        return result
+
+    # a fresh spellcheck index and Renderer, so every run starts equally cold
+    spellcheck.set_index(
+        spellcheck.SpellcheckIndex(lexicon_path=output / "lexicon.json")
+    )
+    flashcards._renderer = None
+    with fake_services(latency, FakeSpreadsheet(latency)):
+        start = time.perf_counter()
+        text = timed("pdfs_to_string", wordlists.pdfs_to_string, input_path=corpus)
+        words = timed("string_to_words", wordlists.string_to_words, text)
+        words = timed("clean_wordlist", wordlists.clean_wordlist, words)
+        words = timed(
+            "get_most_frequent_words",
+            wordlists.get_most_frequent_words,
+            words,
+            limit=wordlimit,
+        )
+        wordlist = timed(
+            "make_wordlist", wordlists.make_wordlist, words, workers=workers
+        )
+        timed("write_gsheet", wordlists.write_gsheet, wordlist, grade="5")
+        # the rows as they would be read back from the sheet for makecards
+        values = wordlist.to_values()
+        cards = flashcards.make_paired_wordlist(flashcards.make_wordlist(values))
+        content = timed("render_template", flashcards.render_template, "5", cards)
+        timed("render_pdf", flashcards.render_pdf, "5", content, output)
+        timings["end_to_end"] = time.perf_counter() - start
+    return timings
+
+
+def measure_startup() -> float:
+    """Time a fresh interpreter starting the CLI, which is mostly spent importing.
+
+    Returns:
+        float: The time "eikenvocab.py --help" took, in seconds.
+    """
+    script = Path(__file__).parent.parent.resolve() / "eikenvocab" / "eikenvocab.py"
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, str(script), "--help"], check=True, stdout=subprocess.DEVNULL
+    )
+    return time.perf_counter() - start
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """List the stages which got slower than the baseline by more than the tolerance."""
+    regressions = []
+    for stage in STAGES:
+        before = baseline["stages"].get(stage)
+        after = results["stages"].get(stage)
+        if not before or after is None:
+            continue
+        change = after / before - 1
+        marker = ""
+        if change > tolerance:
+            marker = "  REGRESSION"
+            regressions.append(stage)
+        print(f"{stage:<24} {before:9.3f} s -> {after:9.3f} s  {change:+7.1%}{marker}")
+    return regressions
+
+
+def main(
+    pdfs: int = typer.Option(10, "--pdfs", help="The number of synthetic test PDFs."),
+    pages: int = typer.Option(8, "--pages", help="The number of pages per PDF."),
+    words_per_page: int = typer.Option(
+        400, "--words-per-page", help="The number of words on each page."
+    ),
+    wordlimit: int = typer.Option(
+        300, "--wordlimit", help="The number of words in the list and flashcards."
+    ),
+    workers: int = typer.Option(8, "--workers", help="Words looked up at once."),
+    latency: float = typer.Option(
+        0.05, "--latency", help="Seconds each fake remote call takes."
+    ),
+    repeat: int = typer.Option(
+        3, "--repeat", help="Runs per stage; the median is kept."
+    ),
+    seed: int = typer.Option(0, "--seed", help="Seed for the synthetic corpus."),
+    output: Optional[Path] = typer.Option(
+        None, "--output", help="Write the results to this JSON file."
+    ),
+    baseline: Optional[Path] = typer.Option(
+        None, "--baseline", help="Compare the results with this earlier JSON file."
+    ),
+    tolerance: float = typer.Option(
+        0.10, "--tolerance", help="How much slower a stage may get, e.g. 0.10 for 10%."
+    ),
+):
+    config = {
+        "pdfs": pdfs,
+        "pages": pages,
+        "words_per_page": words_per_page,
+        "wordlimit": wordlimit,
+        "workers": workers,
+        "latency": latency,
+        "repeat": repeat,
+        "seed": seed,
+    }
+    with tempfile.TemporaryDirectory() as tmpdir:
+        corpus = Path(tmpdir) / "corpus"
+        words = make_corpus(corpus, pdfs, pages, words_per_page, seed)
+        print(f"Made {pdfs} PDFs of {pages} pages, {words} words in all.")
+        runs = []
+        for run in range(repeat):
+            runs.append(
+                run_once(corpus, Path(tmpdir) / "output", wordlimit, workers, latency)
+            )
+            runs[-1]["startup"] = measure_startup()
+            print(f"Run {run + 1}: {runs[-1]['end_to_end']:.3f} s")
+
+    results = {
+        "config": config,
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "stages": {
+            stage: statistics.median(run[stage] for run in runs) for stage in STAGES
+        },
+    }
+    for stage, seconds in results["stages"].items():
+        print(f"{stage:<24} {seconds:9.3f} s")
+    if output is not None:
+        output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Wrote {output}")
+    if baseline is not None:
+        previous = json.loads(baseline.read_text(encoding="utf-8"))
+        if previous.get("config") != config:
+            print("Warning: the baseline was run with different options.")
+        regressions = compare(results, previous, tolerance)
+        if regressions:
+            print(f"Slower than the baseline: {', '.join(regressions)}")
+            raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,39 @@
+# standard library imports
+from pathlib import Path
+from contextlib import contextmanager
+import os
+import tempfile
+from typing import IO, Iterator, Optional
+
+
+@contextmanager
+def atomic_write(
+    filename: str,
+    mode: str = "wb",
+    encoding: Optional[str] = None,
+    suffix: str = ".tmp",
+) -> Iterator[IO]:
+    """Write a file through a temporary file next to it, which only replaces it once
+    it is complete, so a crash or a failed write never leaves a partial file.
+
+    Args:
+        filename (str): The file to write. Its directory is made if it doesn't exist.
+        mode (str, optional): "wb" to write bytes or "w" to write text. Defaults to "wb".
+        encoding (Optional[str], optional): The encoding of text. Defaults to None.
+        suffix (str, optional): The suffix of the temporary file. Defaults to ".tmp".
+
+    Yields:
+        Iterator[IO]: The temporary file, open for writing.
+    """
+    filename = Path(filename)
+    filename.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmpname = tempfile.mkstemp(dir=filename.parent, suffix=suffix)
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as f:
+            yield f
+        # mkstemp makes files only readable by us, unlike a normal write
+        os.chmod(tmpname, 0o644)
+        os.replace(tmpname, filename)
+    except BaseException:
+        os.unlink(tmpname)
+        raise
@@ -1,5 +1,7 @@
 # standard library imports
 from pathlib import Path
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from typing import Optional
 
 # third party imports
@@ -7,12 +9,252 @@ import typer
 
 # local imports
 import tests
-import flashcards
-import wordlists
+import textcache
+import spellcheck
+import enrichcache
+import rendercache
+import profiling
+import journal
+import lemmas
+import wordtable
+from lazyimport import lazy_import
+
+# loaded on first use, so each command only pays for the dependencies it needs
+flashcards = lazy_import("flashcards")
+wordlists = lazy_import("wordlists")
+snapshot = lazy_import("snapshot")
+vocabulary = lazy_import("vocabulary")
+pipeline = lazy_import("pipeline")
+googleapi = lazy_import("googleapi")
 
 
 app = typer.Typer(help="Eiken Vocabulary Flashcard Generator")
 
+# Options shared by several commands
+FROM_YEAR_OPTION = typer.Option(
+    min(tests.DEFAULT_YEARS),
+    "--from-year",
+    help="The first year of tests to download.",
+)
+TO_YEAR_OPTION = typer.Option(
+    max(tests.DEFAULT_YEARS),
+    "--to-year",
+    help="The last year of tests to download.",
+)
+RECHECK_OPTION = typer.Option(
+    False,
+    "--recheck",
+    help="Ask the server whether already downloaded tests have changed, instead of skipping them.",
+)
+WORDLIMIT_OPTION = typer.Option(
+    None,
+    "--wordlimit",
+    "-l",
+    help="The maximum number of words per list.",
+    show_default="no limit",
+)
+EXTRACT_JOBS_OPTION = typer.Option(
+    None,
+    "--jobs",
+    "-j",
+    help="The number of processes to use for reading the PDFs.",
+    show_default="serial",
+)
+TEXT_CACHE_OPTION = typer.Option(
+    False,
+    "--no-cache",
+    help="Read every PDF again, instead of reusing previously extracted text.",
+)
+DICTIONARY_OPTION = typer.Option(
+    list(spellcheck.DEFAULT_VARIANTS),
+    "--dictionary",
+    help="Specify a spellcheck dictionary that words must be found in. Can be repeated for multiple dictionaries.",
+    show_default="en, en_US, en_GB, en_CA and en_AU",
+)
+OFFLINE_LOOKUPS_OPTION = typer.Option(
+    False,
+    "--offline",
+    help="Only use previously saved pronunciations and translations, and stop if a word has none.",
+)
+LOOKUP_WORKERS_OPTION = typer.Option(
+    8,
+    "--workers",
+    "-w",
+    help="The number of words to look up pronunciations and translations for at once.",
+)
+WEB_PRONUNCIATION_OPTION = typer.Option(
+    True,
+    "--web-pronunciation/--no-web-pronunciation",
+    help="Look up the pronunciation of words on freeenglish.jp (with --offline-pronunciation, only of words which aren't in the pronunciation dictionary).",
+)
+OFFLINE_PRONUNCIATION_OPTION = typer.Option(
+    False,
+    "--offline-pronunciation",
+    help="Write the katakana of words in the bundled pronunciation dictionary with its rules, instead of looking them up. Experimental: some words are written differently from the usual katakana.",
+)
+LEMMAS_OPTION = typer.Option(
+    False,
+    "--lemmas",
+    help="Count and look up the forms of each word as one word, e.g. goes and went as go, listing the forms found in a Forms column.",
+)
+INCREMENTAL_OPTION = typer.Option(
+    False,
+    "--incremental",
+    help="Update existing worksheets in place, only writing the rows which changed, instead of backing them up and writing new ones.",
+)
+PROFILE_OPTION = typer.Option(
+    None,
+    "--profile",
+    help="Write a JSON summary of where the time went (stages, remote calls, downloads and caches) to this file.",
+)
+TRACE_OPTION = typer.Option(
+    None,
+    "--profile-trace",
+    help="Write a Chrome trace of the stages and remote calls to this file, for chrome://tracing or Perfetto.",
+)
+
+
+def _select_words(
+    grade: str,
+    counts: Counter,
+    wordlimit: Optional[int],
+    lemmatize: bool,
+    profiler: profiling.Profiler,
+) -> tuple[list[tuple], Optional[dict[str, Counter]]]:
+    """Choose the most frequent real words of a grade, counting the forms of each
+    word as one word if asked to.
+
+    Args:
+        grade (str): The grade.
+        counts (Counter): The frequency of each word in the grade's tests.
+        wordlimit (Optional[int]): The maximum number of words.
+        lemmatize (bool): Whether to count the forms of each word as its base form.
+        profiler (profiling.Profiler): The run's profiler.
+
+    Returns:
+        tuple[list[tuple], Optional[dict[str, Counter]]]: The words and their frequencies, and the frequency of each form of each word if lemmatize is set.
+    """
+    forms = None
+    with profiler.stage("spellcheck", grade=grade):
+        counts = wordlists.clean_word_counts(counts)
+        spellcheck.get_index().save()
+    if lemmatize:
+        with profiler.stage("lemmatize", grade=grade):
+            counts, forms = lemmas.get_index().lemmatize_counts(counts)
+    with profiler.stage("rank", grade=grade):
+        words = wordlists.get_most_frequent_words(words=counts, limit=wordlimit)
+    return words, forms
+
+
+def _describe_forms(
+    grade: str, words: list[tuple], forms: Optional[dict[str, Counter]]
+) -> Optional[dict[str, str]]:
+    """Print what counting base forms saved for a grade, and describe the forms of
+    each word for the Forms column.
+
+    Args:
+        grade (str): The grade.
+        words (list[tuple]): The base forms chosen for the grade, with their frequencies.
+        forms (Optional[dict[str, Counter]]): The frequency of each form of each base form, or None if the words aren't base forms.
+
+    Returns:
+        Optional[dict[str, str]]: The description of each word's forms, or None if the words aren't base forms.
+    """
+    if forms is None:
+        return None
+    print(lemmas.report(grade, words, forms))
+    return {word: lemmas.describe_forms(forms[word]) for word, _ in words}
+
+
+def _enrich(
+    grade: str,
+    words: list[tuple],
+    lookups: enrichcache.EnrichmentCache,
+    workers: int,
+    webpronunciation: bool,
+    offlinepronunciation: bool,
+    profiler: profiling.Profiler,
+    grade_journal: Optional[journal.Journal] = None,
+) -> wordtable.WordTable:
+    """Look up the pronunciations and translations of a grade's words.
+
+    Args:
+        grade (str): The grade.
+        words (list[tuple]): The words and their frequencies.
+        lookups (enrichcache.EnrichmentCache): The run's cache of pronunciations and translations.
+        workers (int): The number of words to look up at once.
+        webpronunciation (bool): Whether to scrape the katakana of words which don't get it from the pronunciation dictionary.
+        offlinepronunciation (bool): Whether to write the katakana of words in the pronunciation dictionary with its rules.
+        profiler (profiling.Profiler): The run's profiler.
+        grade_journal (Optional[journal.Journal], optional): The grade's journal, to record each word in as it is done. Defaults to None.
+
+    Returns:
+        wordtable.WordTable: The grade's wordlist.
+    """
+    with profiler.stage("enrich", grade=grade):
+        return wordlists.make_wordlist(
+            words=words,
+            cache=lookups,
+            workers=workers,
+            web_fallback=webpronunciation,
+            offline_pronunciation=offlinepronunciation,
+            journal=grade_journal,
+        )
+
+
+def _write_wordlist(
+    grade: str,
+    wordlist: wordtable.WordTable,
+    forms: Optional[dict[str, str]],
+    incremental: bool,
+    datapath: str,
+    profiler: profiling.Profiler,
+):
+    """Save a grade's wordlist locally and write it to Google Sheets.
+
+    Args:
+        grade (str): The grade.
+        wordlist (wordtable.WordTable): The grade's wordlist.
+        forms (Optional[dict[str, str]]): The description of each word's forms, added as a Forms column, or None for no column.
+        incremental (bool): Whether to update the existing worksheet in place.
+        datapath (str): The data path, where the local copy is saved.
+        profiler (profiling.Profiler): The run's profiler.
+    """
+    if forms is not None:
+        wordlist = lemmas.add_forms(wordlist, forms)
+    # keep a local copy, which makecards --local can use without Sheets
+    wordlist.save(wordtable.table_file(grade, datapath))
+    with profiler.stage("write_gsheet", grade=grade):
+        wordlists.write_gsheet(wordlist=wordlist, grade=grade, incremental=incremental)
+
+
+def _report_lists(
+    profiler: profiling.Profiler,
+    lookups: enrichcache.EnrichmentCache,
+    cache: Optional[textcache.TextCache],
+):
+    """Print and profile how the spellcheck, lookup and PDF text caches and the
+    Google APIs were used, and trim the PDF text cache, at the end of a run.
+
+    Args:
+        profiler (profiling.Profiler): The run's profiler.
+        lookups (enrichcache.EnrichmentCache): The run's cache of pronunciations and translations.
+        cache (Optional[textcache.TextCache]): The run's PDF text cache, if any.
+    """
+    index = spellcheck.get_index()
+    print(index.report())
+    print(lookups.report())
+    requests = googleapi.report()
+    if requests is not None:
+        print(requests)
+    profiler.cache("spellcheck", index.memo_hits, index.lookups)
+    for kind in enrichcache.VERSIONS:
+        profiler.cache(kind, lookups.hits[kind], lookups.misses[kind])
+    if cache is not None:
+        cache.evict()
+        print(cache.report())
+        profiler.cache("pdf_text", cache.hits, cache.misses)
+
 
 @app.command()
 def downloadtests(
@@ -29,11 +271,30 @@ def downloadtests(
         "-d",
         help="The path where the test PDFs should be saved.",
     ),
+    fromyear: int = FROM_YEAR_OPTION,
+    toyear: int = TO_YEAR_OPTION,
+    workers: int = typer.Option(
+        8,
+        "--workers",
+        "-w",
+        help="The maximum number of files to download at once.",
+    ),
+    recheck: bool = RECHECK_OPTION,
+    profile: Optional[str] = PROFILE_OPTION,
+    trace: Optional[str] = TRACE_OPTION,
 ):
     """
     Download the test PDFs from the web.
     """
-    tests.scrape_eiken_tests(grades=grades, path=downloadpath)
+    with profiling.profile("downloadtests", profile, trace) as profiler:
+        with profiler.stage("download"):
+            tests.scrape_eiken_tests(
+                grades=grades,
+                path=downloadpath,
+                years=range(toyear, fromyear - 1, -1),
+                workers=workers,
+                recheck=recheck,
+            )
 
 
 @app.command()
@@ -51,28 +312,237 @@ def makelists(
         "-d",
         help="The path where the source PDFs are located.",
     ),
-    wordlimit: Optional[int] = typer.Option(
-        None,
-        "--wordlimit",
-        "-l",
-        help="The maximum number of words per list.",
-        show_default="no limit",
+    wordlimit: Optional[int] = WORDLIMIT_OPTION,
+    rank: str = typer.Option(
+        "frequency",
+        "--rank",
+        help="How to choose the words for each list: frequency, documents (the number of tests a word is in), tfidf (frequent in the grade but rare in the others) or new (not in an easier grade).",
+    ),
+    jobs: Optional[int] = EXTRACT_JOBS_OPTION,
+    nocache: bool = TEXT_CACHE_OPTION,
+    dictionaries: list[str] = DICTIONARY_OPTION,
+    offline: bool = OFFLINE_LOOKUPS_OPTION,
+    workers: int = LOOKUP_WORKERS_OPTION,
+    webpronunciation: bool = WEB_PRONUNCIATION_OPTION,
+    offlinepronunciation: bool = OFFLINE_PRONUNCIATION_OPTION,
+    incremental: bool = INCREMENTAL_OPTION,
+    lemmatize: bool = LEMMAS_OPTION,
+    singlepass: bool = typer.Option(
+        False,
+        "--single-pass",
+        help="Choose the words for every grade first, then look up each distinct word only once for all of them.",
+    ),
+    resume: bool = typer.Option(
+        False,
+        "--resume",
+        help="Continue an interrupted run with the same options, skipping the words and grades it already finished.",
     ),
+    profile: Optional[str] = PROFILE_OPTION,
+    trace: Optional[str] = TRACE_OPTION,
 ):
     """
     Make the wordlists in Google Sheets.
     """
-    for grade in grades:
-        print(f"Starting Grade {grade} ...")
-        input_path = datapath / f"grade_{grade}"
-        words = wordlists.string_to_words(
-            wordlists.pdfs_to_string(input_path=input_path)
-        )
-        words = wordlists.clean_wordlist(words)
-        words = wordlists.get_most_frequent_words(words=words, limit=wordlimit)
-        wordlist = wordlists.make_wordlist(words=words)
-        wordlists.write_gsheet(wordlist=wordlist, grade=grade)
-        print(f"Finished Grade {grade}.")
+    with profiling.profile("makelists", profile, trace) as profiler:
+        cache = None if nocache else textcache.TextCache()
+        spellcheck.set_index(spellcheck.SpellcheckIndex(variants=dictionaries))
+        lookups = enrichcache.EnrichmentCache(offline=offline)
+        if rank not in vocabulary.RANKINGS:
+            raise typer.BadParameter(
+                f"Use one of {', '.join(vocabulary.RANKINGS)}.", param_hint="--rank"
+            )
+        unknown = [grade for grade in grades if grade not in vocabulary.GRADES]
+        if unknown:
+            raise typer.BadParameter(
+                f"Unknown grades {', '.join(unknown)}.", param_hint="--grade"
+            )
+        if rank == "tfidf" and len(set(grades)) < 2:
+            raise typer.BadParameter(
+                "tfidf compares grades; give at least two with -g.",
+                param_hint="--rank",
+            )
+        # progress is journaled as it goes, so an interrupted run can be resumed
+        options = {
+            "datapath": str(datapath),
+            "wordlimit": wordlimit,
+            "rank": rank,
+            "dictionaries": dictionaries,
+            "web_pronunciation": webpronunciation,
+            "offline_pronunciation": offlinepronunciation,
+            "lemmas": lemmatize,
+        }
+        if rank != "frequency":
+            options["grades"] = sorted(grades)
+        journals = {
+            grade: journal.Journal(f"grade_{grade}", options, resume=resume)
+            for grade in grades
+        }
+        for grade, grade_journal in journals.items():
+            progress = grade_journal.report()
+            if progress is not None:
+                print(f"Grade {grade}: {progress}.")
+        ranked = None
+        if rank != "frequency" and any(
+            grade_journal.words is None for grade_journal in journals.values()
+        ):
+            # the other rankings compare grades, so count every grade's PDFs first
+            with profiler.stage("extract"):
+                ranked = wordlists.build_vocabulary(
+                    grades=grades,
+                    datapath=datapath,
+                    jobs=jobs,
+                    cache=cache,
+                    lemmatize=lemmatize,
+                    # whether a word is new depends on every easier grade
+                    easier_grades=rank == "new",
+                )
+            spellcheck.get_index().save()
+        selected = {}
+        for grade in grades:
+            grade_journal = journals[grade]
+            if grade_journal.written and not singlepass:
+                print(f"Grade {grade} was already finished.")
+                continue
+            print(f"Starting Grade {grade} ...")
+            if grade_journal.words is not None:
+                words = grade_journal.words
+            else:
+                forms = None
+                if ranked is not None:
+                    with profiler.stage("rank", grade=grade):
+                        words = ranked.rank(grade, method=rank, limit=wordlimit)
+                    if lemmatize:
+                        forms = {word: ranked.forms(grade, word) for word, _ in words}
+                else:
+                    input_path = Path(datapath) / f"grade_{grade}"
+                    # count each PDF's words as soon as its text has been extracted
+                    with profiler.stage("extract", grade=grade):
+                        counts = wordlists.count_words(
+                            text
+                            for _, text in wordlists.iter_pdf_texts(
+                                input_path=input_path, jobs=jobs, cache=cache
+                            )
+                        )
+                    words, forms = _select_words(
+                        grade, counts, wordlimit, lemmatize, profiler
+                    )
+                grade_journal.record_words(
+                    words, forms=_describe_forms(grade, words, forms)
+                )
+            if singlepass:
+                selected[grade] = words
+                continue
+            wordlist = _enrich(
+                grade,
+                words,
+                lookups,
+                workers,
+                webpronunciation,
+                offlinepronunciation,
+                profiler,
+                grade_journal=grade_journal,
+            )
+            forms = grade_journal.forms if lemmatize else None
+            _write_wordlist(grade, wordlist, forms, incremental, datapath, profiler)
+            grade_journal.record_written()
+            print(f"Finished Grade {grade}.")
+        if singlepass:
+            # the distinct words are journaled together, in the order of the grades
+            pass_journal = journal.Journal(
+                "single_pass", dict(options, grades=list(grades)), resume=resume
+            )
+            with profiler.stage("enrich"):
+                grade_wordlists = wordlists.make_wordlists(
+                    grade_words=selected,
+                    cache=lookups,
+                    workers=workers,
+                    web_fallback=webpronunciation,
+                    offline_pronunciation=offlinepronunciation,
+                    journal=pass_journal,
+                )
+            pass_journal.close()
+            for grade, wordlist in grade_wordlists.items():
+                if journals[grade].written:
+                    print(f"Grade {grade} was already finished.")
+                    continue
+                forms = journals[grade].forms if lemmatize else None
+                _write_wordlist(grade, wordlist, forms, incremental, datapath, profiler)
+                journals[grade].record_written()
+                print(f"Finished Grade {grade}.")
+        for grade_journal in journals.values():
+            grade_journal.close()
+        _report_lists(profiler, lookups, cache)
+
+
+@app.command("pipeline")
+def downloadandmakelists(
+    grades: list[str] = typer.Option(
+        ["5", "4", "3", "p2", "2", "p1", "1"],
+        "--grade",
+        "-g",
+        help="Specify a grade to download tests and create a list for. Can be repeated for multiple grades.",
+        show_default="all grades",
+    ),
+    datapath: str = typer.Option(
+        Path(__file__).parent.parent.resolve() / "data",
+        "--datapath",
+        "-d",
+        help="The path where the test PDFs should be saved.",
+    ),
+    fromyear: int = FROM_YEAR_OPTION,
+    toyear: int = TO_YEAR_OPTION,
+    downloadworkers: int = typer.Option(
+        8,
+        "--download-workers",
+        help="The maximum number of files to download at once.",
+    ),
+    recheck: bool = RECHECK_OPTION,
+    wordlimit: Optional[int] = WORDLIMIT_OPTION,
+    jobs: Optional[int] = EXTRACT_JOBS_OPTION,
+    nocache: bool = TEXT_CACHE_OPTION,
+    dictionaries: list[str] = DICTIONARY_OPTION,
+    offline: bool = OFFLINE_LOOKUPS_OPTION,
+    workers: int = LOOKUP_WORKERS_OPTION,
+    webpronunciation: bool = WEB_PRONUNCIATION_OPTION,
+    offlinepronunciation: bool = OFFLINE_PRONUNCIATION_OPTION,
+    lemmatize: bool = LEMMAS_OPTION,
+    incremental: bool = INCREMENTAL_OPTION,
+    profile: Optional[str] = PROFILE_OPTION,
+    trace: Optional[str] = TRACE_OPTION,
+):
+    """
+    Download the test PDFs and make the wordlists in one run, reading each PDF as soon as it has downloaded.
+    """
+    with profiling.profile("pipeline", profile, trace) as profiler:
+        cache = None if nocache else textcache.TextCache()
+        spellcheck.set_index(spellcheck.SpellcheckIndex(variants=dictionaries))
+        lookups = enrichcache.EnrichmentCache(offline=offline)
+        with profiler.stage("download+extract"):
+            grade_counts = pipeline.download_and_count(
+                grades=grades,
+                path=datapath,
+                years=range(toyear, fromyear - 1, -1),
+                workers=downloadworkers,
+                jobs=jobs,
+                recheck=recheck,
+                cache=cache,
+            )
+        for grade, counts in grade_counts.items():
+            print(f"Starting Grade {grade} ...")
+            words, forms = _select_words(grade, counts, wordlimit, lemmatize, profiler)
+            forms = _describe_forms(grade, words, forms)
+            wordlist = _enrich(
+                grade,
+                words,
+                lookups,
+                workers,
+                webpronunciation,
+                offlinepronunciation,
+                profiler,
+            )
+            _write_wordlist(grade, wordlist, forms, incremental, datapath, profiler)
+            print(f"Finished Grade {grade}.")
+        _report_lists(profiler, lookups, cache)
 
 
 @app.command()
@@ -90,24 +560,137 @@ def makecards(
         "-o",
         help="The path where the PDF files will be saved.",
     ),
+    offline: bool = typer.Option(
+        False,
+        "--offline",
+        help="Use the data saved by the last run, without connecting to Google Sheets.",
+    ),
+    local: bool = typer.Option(
+        False,
+        "--local",
+        help="Use the word lists as makelists last made them, saved locally, instead of the reviewed ones in Google Sheets.",
+    ),
+    datapath: str = typer.Option(
+        Path(__file__).parent.parent.resolve() / "data",
+        "--datapath",
+        "-d",
+        help="With --local, the path makelists was given, where it saved the word lists.",
+    ),
+    jobs: Optional[int] = typer.Option(
+        None,
+        "--jobs",
+        "-j",
+        help="The number of grades to render at once, each in its own process. With --chunk-size, the number of chunks of each grade to render at once instead.",
+        show_default="one at a time",
+    ),
+    chunksize: Optional[int] = typer.Option(
+        None,
+        "--chunk-size",
+        help="Render each grade this many pairs of cards at a time, then merge them, to keep memory use down for large grades.",
+        show_default="50 with the render cache, otherwise the whole grade at once",
+    ),
+    nocache: bool = typer.Option(
+        False,
+        "--no-cache",
+        help="Render every card again, instead of reusing chunks whose cards haven't changed. Without --chunk-size, each grade is rendered as one document.",
+    ),
+    profile: Optional[str] = PROFILE_OPTION,
+    trace: Optional[str] = TRACE_OPTION,
 ):
     """
     Make the flashcard PDFs from the data in Google Sheets.
     """
-    for grade in grades:
-        print(f"Starting Grade {grade} ...")
-        data = flashcards.get_data_for_grade(grade)
-        # Use Pre-2, not p2 for flashcard labels
-        long_grade = grade.replace("p", "Pre-")
-        wordlist = flashcards.make_wordlist(data)
-        # Make sure to replace all blanks with ones that work in the template
-        wordlist = flashcards.replace_all_blanks(wordlist)
-        pairedwordlist = flashcards.make_paired_wordlist(wordlist=wordlist)
-        content = flashcards.render_template(grade=long_grade, wordlist=pairedwordlist)
-        outfilename = flashcards.render_pdf(
-            grade=grade, content=content, output_path=outputpath
-        )
-        print(f"Finished Grade {grade}.")
+    with profiling.profile("makecards", profile, trace) as profiler:
+        # fetch every grade at once, or reuse the last fetch if the sheet hasn't changed
+        with profiler.stage("fetch"):
+            if local:
+                missing = [
+                    grade
+                    for grade in grades
+                    if not wordtable.table_file(grade, datapath).exists()
+                ]
+                if missing:
+                    raise typer.BadParameter(
+                        f"No saved word list for grades {', '.join(missing)}; run makelists first.",
+                        param_hint="--local",
+                    )
+                alldata = {
+                    grade: wordtable.WordTable.load(
+                        wordtable.table_file(grade, datapath)
+                    )
+                    for grade in grades
+                }
+            else:
+                alldata = flashcards.get_data_for_grades(
+                    grades, snapshot=snapshot.SheetSnapshot(offline=offline)
+                )
+        cache = None if nocache else rendercache.RenderCache()
+        failed = []
+        if jobs and jobs > 1 and not chunksize:
+            # each grade renders in its own process; one failing doesn't stop the others
+            with profiler.stage("render"), ProcessPoolExecutor(
+                max_workers=jobs
+            ) as executor:
+                futures = {}
+                for grade in grades:
+                    print(f"Starting Grade {grade} ...")
+                    if cache is None:
+                        future = executor.submit(
+                            flashcards.render_grade, grade, alldata[grade], outputpath
+                        )
+                    else:
+                        future = executor.submit(
+                            flashcards.render_grade_cached,
+                            grade,
+                            alldata[grade],
+                            outputpath,
+                            cache,
+                        )
+                    futures[future] = grade
+                for future in as_completed(futures):
+                    grade = futures[future]
+                    try:
+                        result = future.result()
+                        if cache is not None:
+                            # the grade's process counted its pages on its own copy
+                            _, reused, rendered = result
+                            cache.pages_reused += reused
+                            cache.pages_rendered += rendered
+                        print(f"Finished Grade {grade}.")
+                    except Exception as error:
+                        print(f"Grade {grade} failed: {error!r}")
+                        failed.append(grade)
+        else:
+            # the render cache works a chunk at a time, so chunk every grade while it is on
+            if not chunksize and cache is not None:
+                chunksize = flashcards.CHUNK_SIZE
+            for grade in grades:
+                print(f"Starting Grade {grade} ...")
+                try:
+                    with profiler.stage("render", grade=grade):
+                        flashcards.render_grade(
+                            grade,
+                            alldata[grade],
+                            outputpath,
+                            chunk_size=chunksize,
+                            jobs=jobs,
+                            cache=cache,
+                        )
+                    print(f"Finished Grade {grade}.")
+                except Exception as error:
+                    print(f"Grade {grade} failed: {error!r}")
+                    failed.append(grade)
+        if cache is not None:
+            cache.evict()
+            print(cache.report())
+            profiler.cache("render", cache.pages_reused, cache.pages_rendered)
+        if not (offline or local):
+            requests = googleapi.report()
+            if requests is not None:
+                print(requests)
+        if failed:
+            print(f"Failed grades: {', '.join(failed)}")
+            raise typer.Exit(code=1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,206 @@
+# standard library imports
+from pathlib import Path
+from collections import Counter
+import sqlite3
+import threading
+import time
+from typing import Callable, Optional
+
+# Bump the version of a lookup to invalidate everything cached for it,
+#  e.g. after changing how translations are cleaned up
+VERSIONS = {"katakana": 1, "translation": 1, "hiragana": 1}
+# Lookups which need the network, as opposed to local ones like kakasi
+REMOTE_LOOKUPS = {"katakana", "translation"}
+
+
+class CacheMissError(LookupError):
+    """Raised in offline mode when a lookup which needs the network isn't in the cache."""
+
+
+class EnrichmentCache:
+    """A persistent cache of the pronunciations and translations of words,
+    shared by all grades, so each word only needs to be looked up once.
+    """
+
+    def __init__(
+        self,
+        path: str = Path(__file__).parent.parent.resolve() / "cache/enrichment.sqlite3",
+        ttl_days: Optional[float] = None,
+        versions: dict[str, int] = VERSIONS,
+        offline: bool = False,
+    ):
+        """
+        Args:
+            path (str, optional): The SQLite database file. Defaults to Path(__file__).parent.parent.resolve()/"cache/enrichment.sqlite3".
+            ttl_days (Optional[float], optional): Entries older than this many days are looked up again. Defaults to None, which keeps them forever.
+            versions (dict[str, int], optional): The current version of each lookup; entries from other versions are looked up again. Defaults to VERSIONS.
+            offline (bool, optional): Whether to raise CacheMissError on a miss of a remote lookup, instead of looking the word up. Local lookups, like "hiragana", are still made. Defaults to False.
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_days = ttl_days
+        self.versions = versions
+        self.offline = offline
+        self.hits = Counter()
+        self.misses = Counter()
+        # make_wordlist may look words up from several threads
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute("""CREATE TABLE IF NOT EXISTS lookups (
+                    kind TEXT NOT NULL,
+                    word TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    PRIMARY KEY (kind, word)
+                )""")
+
+    def get(self, kind: str, word: str) -> Optional[str]:
+        """Get a cached lookup, if it is current.
+
+        Args:
+            kind (str): The kind of lookup, e.g. "katakana" or "translation".
+            word (str): The word that was looked up.
+
+        Returns:
+            Optional[str]: The cached value, or None if it is missing, expired or from another version.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, version, created FROM lookups WHERE kind = ? AND word = ?",
+                (kind, word),
+            ).fetchone()
+        if row is None:
+            return None
+        value, version, created = row
+        if version != self.versions.get(kind, 1):
+            return None
+        if (
+            self.ttl_days is not None
+            and time.time() - created > self.ttl_days * 24 * 60 * 60
+        ):
+            return None
+        return value
+
+    def set(self, kind: str, word: str, value: str):
+        """Store a lookup.
+
+        Args:
+            kind (str): The kind of lookup, e.g. "katakana" or "translation".
+            word (str): The word that was looked up.
+            value (str): The result of the lookup.
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO lookups VALUES (?, ?, ?, ?, ?)",
+                (kind, word, value, self.versions.get(kind, 1), time.time()),
+            )
+
+    def lookup(
+        self,
+        kind: str,
+        word: str,
+        function: Callable[[str], str],
+        keep: Optional[Callable[[str], bool]] = None,
+    ) -> str:
+        """Get a lookup from the cache, or make it and store the result.
+
+        Args:
+            kind (str): The kind of lookup, e.g. "katakana" or "translation".
+            word (str): The word to look up.
+            function (Callable[[str], str]): The function which does the lookup.
+            keep (Optional[Callable[[str], bool]], optional): Whether a result is worth storing, so failed lookups can be retried next time. Defaults to None, which stores every result.
+
+        Raises:
+            CacheMissError: In offline mode, if a remote lookup isn't cached.
+
+        Returns:
+            str: The result of the lookup.
+        """
+        value = self.get(kind, word)
+        with self._lock:
+            if value is not None:
+                self.hits[kind] += 1
+            else:
+                self.misses[kind] += 1
+        if value is not None:
+            return value
+        # local lookups don't need the network, so offline mode still makes them
+        if self.offline and kind in REMOTE_LOOKUPS:
+            raise CacheMissError(f"No cached {kind} for '{word}' in offline mode.")
+        value = function(word)
+        if keep is None or keep(value):
+            self.set(kind, word, value)
+        return value
+
+    def lookup_many(
+        self,
+        kind: str,
+        words: list[str],
+        function: Callable[[list[str]], list[str]],
+        chunk_size: Optional[int] = None,
+    ) -> list[str]:
+        """Get lookups from the cache, and make the missing ones together in one call.
+
+        Args:
+            kind (str): The kind of lookup, e.g. "translation".
+            words (list[str]): The words to look up.
+            function (Callable[[list[str]], list[str]]): The function which looks up a list of words, answering in the same order.
+            chunk_size (Optional[int], optional): Make the missing lookups this many at a time, saving each chunk as it arrives, so a failure only loses the current chunk. Defaults to None, which makes them all in one call.
+
+        Raises:
+            CacheMissError: In offline mode, if any of the remote lookups aren't cached.
+
+        Returns:
+            list[str]: The result of each lookup, in the same order as the words.
+        """
+        values = {}
+        missing = []
+        for word in dict.fromkeys(words):
+            value = self.get(kind, word)
+            if value is None:
+                missing.append(word)
+            else:
+                values[word] = value
+        with self._lock:
+            self.hits[kind] += len(values)
+            self.misses[kind] += len(missing)
+        if missing:
+            if self.offline and kind in REMOTE_LOOKUPS:
+                raise CacheMissError(
+                    f"No cached {kind} for {len(missing)} words in offline mode, e.g. '{missing[0]}'."
+                )
+            chunk_size = chunk_size or len(missing)
+            for start in range(0, len(missing), chunk_size):
+                chunk = missing[start : start + chunk_size]
+                for word, value in zip(chunk, function(chunk)):
+                    self.set(kind, word, value)
+                    values[word] = value
+        return [values[word] for word in words]
+
+    def remote_calls_avoided(self) -> int:
+        """Count the network lookups that the cache answered instead.
+
+        Returns:
+            int: The number of remote calls avoided.
+        """
+        return sum(self.hits[kind] for kind in REMOTE_LOOKUPS)
+
+    def report(self) -> str:
+        """Summarize how often the cache was used.
+
+        Returns:
+            str: A one-line summary of hits and misses, and the remote calls avoided.
+        """
+        kinds = ", ".join(
+            f"{kind} {self.hits[kind]}/{self.hits[kind] + self.misses[kind]}"
+            for kind in sorted(set(self.hits) | set(self.misses))
+        )
+        return (
+            f"Enrichment cache hits: {kinds or 'none'}; "
+            f"{self.remote_calls_avoided()} remote calls avoided."
+        )
+
+    def close(self):
+        self._connection.close()
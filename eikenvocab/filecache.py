@@ -0,0 +1,90 @@
+# standard library imports
+from pathlib import Path
+import os
+import time
+from typing import Optional
+
+# local imports
+from atomicfile import atomic_write
+
+
+class FileCache:
+    """An on-disk cache with one file per entry, named by its key, which is trimmed
+    by removing the least recently used entries first.
+
+    Subclasses set the suffix of their entries' files and decide how keys are made.
+    """
+
+    suffix = ".bin"
+
+    def __init__(self, path: str, max_bytes: int, max_age_days: Optional[float] = None):
+        """
+        Args:
+            path (str): The directory where entries are stored.
+            max_bytes (int): The total size the cache is trimmed to on eviction.
+            max_age_days (Optional[float], optional): Entries not used for this many days are evicted. Defaults to None, which keeps entries however old they are.
+        """
+        self.path = Path(path).resolve()
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+
+    def _entry(self, key: str) -> Path:
+        return self.path / f"{key}{self.suffix}"
+
+    def __contains__(self, key: str) -> bool:
+        return self._entry(key).exists()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Get the entry for a key.
+
+        Args:
+            key (str): The key.
+
+        Returns:
+            Optional[bytes]: The entry, or None if there is none.
+        """
+        entry = self._entry(key)
+        try:
+            data = entry.read_bytes()
+        except FileNotFoundError:
+            return None
+        # mark the entry as recently used, for eviction
+        os.utime(entry)
+        return data
+
+    def put(self, key: str, data: bytes):
+        """Store the entry for a key.
+
+        Args:
+            key (str): The key.
+            data (bytes): The entry.
+        """
+        with atomic_write(self._entry(key)) as f:
+            f.write(data)
+
+    def evict(self) -> int:
+        """Remove entries that are too old, then the least recently used
+        entries until the cache fits within max_bytes.
+
+        Returns:
+            int: The number of entries removed.
+        """
+        entries = []
+        for entry in self.path.glob(f"*{self.suffix}"):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry))
+        entries.sort()
+        removed = 0
+        if self.max_age_days is not None:
+            cutoff = time.time() - self.max_age_days * 24 * 60 * 60
+            while entries and entries[0][0] < cutoff:
+                entries.pop(0)[2].unlink()
+                removed += 1
+        total = sum(size for _, size, _ in entries)
+        while entries and total > self.max_bytes:
+            _, size, entry = entries.pop(0)
+            entry.unlink()
+            total -= size
+            removed += 1
+        return removed
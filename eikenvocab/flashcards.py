@@ -1,51 +1,67 @@
 # standard library imports
+from __future__ import annotations
 from pathlib import Path
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import itertools
-import re
 import pprint
+from typing import Iterator, Optional, Union
 
 # third party imports
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 import jinja2
-from weasyprint import HTML
-import fitz  # pyMuPDF - get text from PDFs
+from weasyprint import HTML, CSS
+from weasyprint.fonts import FontConfiguration
+
+# local imports
+from snapshot import SheetSnapshot
+from rendercache import RenderCache
+from wordtable import WordTable, BLANK_REGEX, BLANK_HTML
+from lazyimport import lazy_import
+
+# third party imports, loaded on first use
+gspread = lazy_import("gspread")
+googleapi = lazy_import("googleapi")
+fitz = lazy_import("fitz")  # pyMuPDF - get text from PDFs
+
+# The pairs of cards per chunk when a grade is rendered a chunk at a time, e.g. to
+#  reuse the chunks which haven't changed from the render cache
+CHUNK_SIZE = 50
 
 
 def replace_blank(string: str) -> str:
-    blank_regex = "([_])\w+"
-    new_blank = '<span class="blank">____</span>'
-    return re.sub(blank_regex, new_blank, string)
+    return BLANK_REGEX.sub(BLANK_HTML, string)
 
 
 def replace_all_blanks(wordlist: list[dict]) -> list[dict]:
-    for worddict in wordlist:
-        for key, value in worddict.items():
-            if isinstance(value, str):
-                worddict[key] = replace_blank(value)
-    return wordlist
+    return WordTable.from_records(wordlist).replace_blanks().records()
 
 
-def get_data_for_grade(grade: str) -> list[list[str]]:
+def authorize() -> gspread.Client:
+    """Get a gspread client authorized with the service account credentials.
+
+    Returns:
+        gspread.Client: The client shared by the whole run.
+    """
+    return googleapi.get_client()
+
+
+def get_data_for_grade(
+    grade: str, snapshot: Optional[SheetSnapshot] = None
+) -> list[list[str]]:
     """Get data for a grade level from a Google Sheet
 
     Args:
         grade (str): The grade level of the data to get.
+        snapshot (Optional[SheetSnapshot], optional): A local snapshot of the sheet to get the data from. Defaults to None, which fetches it directly.
 
     Returns:
         list[list[str]]: The contents of the sheet in list form (two-dimensional).
     """
+    if snapshot is not None:
+        return snapshot.load([grade], client_factory=authorize)[grade]
     # Fetch data from Google Sheet
     sheetname = "Eiken Vocabulary (final)"
-    credsfile = Path(__file__).parent.parent.resolve() / "creds.json"
-    scope = [
-        "https://spreadsheets.google.com/feeds",
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive.file",
-        "https://www.googleapis.com/auth/drive",
-    ]
-    creds = ServiceAccountCredentials.from_json_keyfile_name(credsfile, scope)
-    client = gspread.authorize(creds)
+    client = authorize()
     try:
         sheet = client.open(sheetname).worksheet(f"grade_{grade}")
         return sheet.get_all_values()
@@ -54,6 +70,23 @@ def get_data_for_grade(grade: str) -> list[list[str]]:
         return []
 
 
+def get_data_for_grades(
+    grades: list[str], snapshot: Optional[SheetSnapshot] = None
+) -> dict[str, list[list[str]]]:
+    """Get data for several grade levels from a Google Sheet, in one batch.
+
+    Args:
+        grades (list[str]): The grade levels of the data to get.
+        snapshot (Optional[SheetSnapshot], optional): The local snapshot of the sheet to use. Defaults to None, which uses one for "Eiken Vocabulary (final)".
+
+    Returns:
+        dict[str, list[list[str]]]: The contents of each grade's sheet in list form (two-dimensional).
+    """
+    if snapshot is None:
+        snapshot = SheetSnapshot()
+    return snapshot.load(grades, client_factory=authorize)
+
+
 def make_wordlist(data: list[list[str]]) -> list[dict]:
     """Create a list of dictionaries to hold the wordlist data.
 
@@ -63,15 +96,8 @@ def make_wordlist(data: list[list[str]]) -> list[dict]:
     Returns:
         list[dict]: A list of dictionaries containing the word and pronunciation, translation, etc.
     """
-    wordlist = []
     # the first row of the data is the spreadsheet header, use as keys
-    keys = data[0]
-    keys.insert(0, "ID")
-    # loop over the rest of the data, excluding the first row
-    for count, word in enumerate(data[1:], start=1):
-        word.insert(0, count)
-        wordlist.append(dict(zip(keys, word)))
-    return wordlist
+    return WordTable.from_values(data).with_ids().records()
 
 
 def make_paired_wordlist(wordlist: list[dict]) -> list[tuple[dict, dict]]:
@@ -97,6 +123,96 @@ def make_paired_wordlist(wordlist: list[dict]) -> list[tuple[dict, dict]]:
     return paired_wordlist
 
 
+class Renderer:
+    """A long-lived flashcard renderer, which loads the templates and parses the
+    stylesheets and fonts once, then shares them across every document it renders.
+    """
+
+    TEMPLATE_FILE = "cards.html"
+    STYLESHEETS = ["css/reset.css", "css/flashcards.css"]
+
+    def __init__(
+        self,
+        template_path: str = Path(__file__).parent.resolve() / "templates/",
+        static_path: str = Path(__file__).parent.resolve() / "static/",
+        bytecode_cache_path: Optional[str] = Path(__file__).parent.parent.resolve()
+        / "cache/jinja/",
+    ):
+        """
+        Args:
+            template_path (str, optional): The path of the jinja2 templates. Defaults to the package's templates.
+            static_path (str, optional): The path of the CSS, fonts and images. Defaults to the package's static files.
+            bytecode_cache_path (Optional[str], optional): Where compiled templates are kept between runs, or None not to keep them. Defaults to Path(__file__).parent.parent.resolve()/"cache/jinja/".
+        """
+        self.static_path = Path(static_path).resolve()
+        bytecode_cache = None
+        if bytecode_cache_path is not None:
+            Path(bytecode_cache_path).mkdir(parents=True, exist_ok=True)
+            bytecode_cache = jinja2.FileSystemBytecodeCache(str(bytecode_cache_path))
+        self.template_env = jinja2.Environment(
+            loader=jinja2.FileSystemLoader(searchpath=str(template_path)),
+            bytecode_cache=bytecode_cache,
+        )
+        self.template = self.template_env.get_template(self.TEMPLATE_FILE)
+        # one font configuration for every document, so the fonts are only loaded once
+        self.font_config = FontConfiguration()
+        self.stylesheets = [
+            CSS(
+                filename=str(self.static_path / stylesheet),
+                font_config=self.font_config,
+            )
+            for stylesheet in self.STYLESHEETS
+        ]
+
+    def render_template(self, grade: str, wordlist: list[dict]) -> str:
+        """Render HTML from the cards template.
+
+        Args:
+            grade (str): The grade level of the content.
+            wordlist (list[dict]): The list of words and their pronunciations, translations, etc.
+
+        Returns:
+            str: The rendered HTML content.
+        """
+        # the stylesheets are already parsed, so the template doesn't link them
+        return self.template.render(
+            static_path=self.static_path,
+            grade=grade,
+            wordlist=wordlist,
+            external_stylesheets=True,
+        )
+
+    def write_pdf(self, content: str, target: Optional[str] = None) -> Optional[bytes]:
+        """Render a PDF from HTML content.
+
+        Args:
+            content (str): The HTML content.
+            target (Optional[str], optional): The filename to write to. Defaults to None, which returns the PDF instead.
+
+        Returns:
+            Optional[bytes]: The PDF, if there is no target.
+        """
+        html = HTML(string=content, base_url=str(self.static_path))
+        return html.write_pdf(
+            target, stylesheets=self.stylesheets, font_config=self.font_config
+        )
+
+
+_renderer = None
+
+
+def get_renderer() -> Renderer:
+    """Get the renderer shared by the whole run (or process), making it on first use.
+
+    Returns:
+        Renderer: The shared renderer.
+    """
+    global _renderer
+    if _renderer is None:
+        _renderer = Renderer()
+    return _renderer
+
+
 def render_template(grade: str, wordlist: list[dict]) -> str:
     """Render HTML from a jinja2 template.
 
@@ -107,16 +223,7 @@ def render_template(grade: str, wordlist: list[dict]) -> str:
     Returns:
         str: The rendered HTML content.
     """
-    template_loader = jinja2.FileSystemLoader(searchpath="./templates/")
-    template_env = jinja2.Environment(loader=template_loader)
-    TEMPLATE_FILE = "cards.html"
-    template = template_env.get_template(TEMPLATE_FILE)
-    template_path = Path(__file__).parent.resolve() / "templates/"
-    static_path = Path(__file__).parent.resolve() / "static/"
-    output_text = template.render(
-        static_path=static_path, grade=grade, wordlist=wordlist
-    )
-    return output_text
+    return get_renderer().render_template(grade=grade, wordlist=wordlist)
 
 
 def render_pdf(grade: str, content: str, output_path: str) -> str:
@@ -133,13 +240,216 @@ def render_pdf(grade: str, content: str, output_path: str) -> str:
     output_path = Path(output_path).resolve()
     Path(output_path).mkdir(parents=True, exist_ok=True)
     filename = f"{output_path}/grade-{grade}.pdf"
-    # Create Weasyprint HTML object
-    html = HTML(string=content)
     # Output PDF via Weasyprint
-    html.write_pdf(filename)
+    get_renderer().write_pdf(content, filename)
+    return filename
+
+
+def render_chunk(grade: str, wordlist: list[tuple[dict, dict]]) -> tuple[bytes, bool]:
+    """Render the flashcards for part of a paired wordlist to PDF in memory.
+    If the chunk fails to render, each pair of cards is rendered on its own,
+    and only the pairs which still fail are left out.
+
+    Args:
+        grade (str): The grade level of the content, as used for labels.
+        wordlist (list[tuple[dict, dict]]): Part of the paired wordlist.
+
+    Returns:
+        tuple[bytes, bool]: The PDF, and whether every card is in it.
+    """
+    try:
+        renderer = get_renderer()
+        return renderer.write_pdf(renderer.render_template(grade, wordlist)), True
+    except Exception as error:
+        if len(wordlist) == 1:
+            word1, word2 = wordlist[0]
+            ids = ", ".join(str(word["ID"]) for word in (word1, word2) if word)
+            print(f"Leaving out cards {ids} of Grade {grade}: {error!r}")
+            return b"", False
+    doc = fitz.open()
+    complete = True
+    for pair in wordlist:
+        pdf, rendered = render_chunk(grade, [pair])
+        complete = complete and rendered
+        if pdf:
+            doc.insert_pdf(fitz.open(stream=pdf, filetype="pdf"))
+    return (doc.tobytes() if len(doc) else b""), complete
+
+
+def iter_rendered_chunks(
+    grade: str, chunks: list[list[tuple[dict, dict]]], jobs: Optional[int] = None
+) -> Iterator[tuple[bytes, bool]]:
+    """Render chunks of a paired wordlist, in order, keeping at most a few finished
+    chunks in memory at once.
+
+    Args:
+        grade (str): The grade level of the content, as used for labels.
+        chunks (list[list[tuple[dict, dict]]]): The paired wordlist, split into chunks.
+        jobs (Optional[int], optional): The number of processes to render with. Defaults to None, which renders in this process.
+
+    Yields:
+        Iterator[tuple[bytes, bool]]: The PDF of each chunk, and whether every card is in it.
+    """
+    if not jobs or jobs < 2:
+        for chunk in chunks:
+            yield render_chunk(grade, chunk)
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(render_chunk, grade, chunk))
+            # don't let finished chunks pile up ahead of the merge
+            if len(pending) >= jobs * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def render_pdf_chunked(
+    grade: str,
+    wordlist: list[tuple[dict, dict]],
+    output_path: str,
+    chunk_size: int = CHUNK_SIZE,
+    jobs: Optional[int] = None,
+    cache: Optional[RenderCache] = None,
+) -> str:
+    """Render the PDF for a paired wordlist a chunk at a time, then merge the chunks,
+    so that the memory used doesn't grow with the number of words.
+
+    Args:
+        grade (str): The grade level of the content.
+        wordlist (list[tuple[dict, dict]]): The paired wordlist.
+        output_path (str): The path where the resulting PDF will be saved.
+        chunk_size (int, optional): The number of pairs of cards (two pages each) per chunk. Defaults to CHUNK_SIZE.
+        jobs (Optional[int], optional): The number of processes to render chunks with. Defaults to None, which renders in this process.
+        cache (Optional[RenderCache], optional): A cache of previously rendered chunks. Only chunks whose cards have changed are rendered. Defaults to None.
+
+    Returns:
+        str: Returns the filename of the output PDF.
+    """
+    output_path = Path(output_path).resolve()
+    Path(output_path).mkdir(parents=True, exist_ok=True)
+    filename = f"{output_path}/grade-{grade}.pdf"
+    # Use Pre-2, not p2 for flashcard labels
+    long_grade = grade.replace("p", "Pre-")
+    chunks = [
+        wordlist[start : start + chunk_size]
+        for start in range(0, len(wordlist), chunk_size)
+    ]
+    keys = []
+    hits = set()
+    if cache is not None:
+        keys = [cache.key(long_grade, chunk) for chunk in chunks]
+        hits = {index for index, key in enumerate(keys) if key in cache}
+    misses = [index for index in range(len(chunks)) if index not in hits]
+    rendered = iter_rendered_chunks(
+        long_grade, [chunks[index] for index in misses], jobs=jobs
+    )
+    reused_pages = rendered_pages = 0
+    doc = fitz.open()
+    for index, chunk in enumerate(chunks):
+        # read cached chunks as they are merged, so only one is in memory at once
+        pdf = cache.get(keys[index]) if index in hits else None
+        reused = pdf is not None
+        if index not in hits:
+            pdf, complete = next(rendered)
+        elif not reused:
+            # evicted since it was found, e.g. by another run
+            pdf, complete = render_chunk(long_grade, chunk)
+        # a chunk with cards left out is rendered again next time, not reused
+        if cache is not None and not reused and complete:
+            cache.put(keys[index], pdf)
+        if not pdf:
+            continue
+        pages = len(doc)
+        doc.insert_pdf(fitz.open(stream=pdf, filetype="pdf"))
+        if reused:
+            reused_pages += len(doc) - pages
+        else:
+            rendered_pages += len(doc) - pages
+    doc.save(filename, garbage=3, deflate=True)
+    if cache is not None:
+        cache.pages_reused += reused_pages
+        cache.pages_rendered += rendered_pages
+        print(
+            f"Grade {grade}: {reused_pages} pages reused, {rendered_pages} pages rendered."
+        )
     return filename
 
 
+def render_grade(
+    grade: str,
+    data: Union[list[list[str]], WordTable],
+    output_path: str,
+    chunk_size: Optional[int] = None,
+    jobs: Optional[int] = None,
+    cache: Optional[RenderCache] = None,
+) -> str:
+    """Render the flashcard PDF for a grade level from its sheet data.
+
+    Args:
+        grade (str): The grade level of the content.
+        data (Union[list[list[str]], WordTable]): The contents of the grade's sheet in list form (two-dimensional), or its wordlist as saved by makelists.
+        output_path (str): The path where the resulting PDF will be saved.
+        chunk_size (Optional[int], optional): The number of pairs of cards to render at a time. Defaults to None, which renders the whole grade as one document.
+        jobs (Optional[int], optional): The number of processes to render chunks with. Defaults to None.
+        cache (Optional[RenderCache], optional): A cache of previously rendered chunks, used with chunk_size. Defaults to None.
+
+    Returns:
+        str: Returns the filename of the output PDF.
+    """
+    # Use Pre-2, not p2 for flashcard labels
+    long_grade = grade.replace("p", "Pre-")
+    if not isinstance(data, WordTable):
+        data = WordTable.from_values(data)
+    # Make sure to replace all blanks with ones that work in the template
+    wordlist = data.with_ids().replace_blanks().records()
+    pairedwordlist = make_paired_wordlist(wordlist=wordlist)
+    if chunk_size:
+        return render_pdf_chunked(
+            grade=grade,
+            wordlist=pairedwordlist,
+            output_path=output_path,
+            chunk_size=chunk_size,
+            jobs=jobs,
+            cache=cache,
+        )
+    content = render_template(grade=long_grade, wordlist=pairedwordlist)
+    return render_pdf(grade=grade, content=content, output_path=output_path)
+
+
+def render_grade_cached(
+    grade: str,
+    data: Union[list[list[str]], WordTable],
+    output_path: str,
+    cache: RenderCache,
+    chunk_size: int = CHUNK_SIZE,
+) -> tuple[str, int, int]:
+    """Render the flashcard PDF for a grade level a chunk at a time, reusing the
+    chunks in the render cache, e.g. in a process of its own, whose copy of the
+    cache doesn't count the pages for the caller.
+
+    Args:
+        grade (str): The grade level of the content.
+        data (Union[list[list[str]], WordTable]): The contents of the grade's sheet, or its saved wordlist.
+        output_path (str): The path where the resulting PDF will be saved.
+        cache (RenderCache): A cache of previously rendered chunks.
+        chunk_size (int, optional): The number of pairs of cards to render at a time. Defaults to CHUNK_SIZE.
+
+    Returns:
+        tuple[str, int, int]: The filename of the output PDF, and the number of pages reused and rendered.
+    """
+    reused, rendered = cache.pages_reused, cache.pages_rendered
+    filename = render_grade(
+        grade, data, output_path, chunk_size=chunk_size, cache=cache
+    )
+    return (
+        filename,
+        cache.pages_reused - reused,
+        cache.pages_rendered - rendered,
+    )
+
+
 def reorder_pdf(filename: str):
     """Reorder the pages in the flashcard PDF so we can print
     two per postcard page, duplex, while keeping the front
@@ -0,0 +1,204 @@
+# standard library imports
+from pathlib import Path
+import threading
+from typing import Optional
+
+# third party imports
+import gspread
+from oauth2client.service_account import ServiceAccountCredentials
+import requests
+
+# local imports
+from ratelimit import RemoteService
+
+CREDS_FILE = Path(__file__).parent.parent.resolve() / "creds.json"
+SCOPES = [
+    "https://spreadsheets.google.com/feeds",
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive.file",
+    "https://www.googleapis.com/auth/drive",
+]
+# The requests each quota allows per minute: the Sheets API allows 60 reads and 60
+#  writes a minute per user, and the Drive API (finding and checking sheets) more
+QUOTAS = {"read": 60, "write": 60, "drive": 600}
+# The hosts the APIs are served from, which a fake endpoint stands in for
+API_HOSTS = ("https://sheets.googleapis.com", "https://www.googleapis.com")
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Whether a failed request to a Google API is worth retrying.
+
+    Args:
+        error (Exception): The error the request raised.
+
+    Returns:
+        bool: True for rate limiting, server errors, timeouts and dropped connections.
+    """
+    if isinstance(error, gspread.exceptions.APIError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+
+class QuotaScheduler:
+    """Spaces out the requests to Google APIs so they stay within the per-minute
+    quotas, and retries the ones which fail transiently (e.g. 429 Too Many
+    Requests), after a growing, randomized wait.
+
+    Each quota gets its own token bucket, which holds a few requests for bursts
+    and refills at the rest of the quota, so no window of time ever goes over it.
+    """
+
+    def __init__(
+        self,
+        quotas: dict[str, int] = QUOTAS,
+        window: float = 60,
+        burst: int = 10,
+        max_concurrency: int = 4,
+        retries: int = 6,
+        backoff: float = 2,
+        max_backoff: float = 64,
+    ):
+        """
+        Args:
+            quotas (dict[str, int], optional): The requests allowed per window for "read", "write" and "drive" requests. Defaults to QUOTAS.
+            window (float, optional): The length of time the quotas are for, in seconds. Defaults to 60.
+            burst (int, optional): The most requests of a kind which may be made at once after a pause. Defaults to 10.
+            max_concurrency (int, optional): The most requests of a kind that may be in flight at once. Defaults to 4.
+            retries (int, optional): How many times to retry a request that failed transiently. Defaults to 6.
+            backoff (float, optional): The longest wait before the first retry, in seconds; it doubles for each retry after that. Defaults to 2.
+            max_backoff (float, optional): The longest wait between retries, in seconds. Defaults to 64.
+        """
+        self.services = {
+            kind: RemoteService(
+                f"Google API ({kind})",
+                max_concurrency=max_concurrency,
+                rate=max(quota - burst, 1) / window,
+                burst=min(burst, quota),
+                retries=retries,
+                backoff=backoff,
+                max_backoff=max_backoff,
+                is_transient=is_transient_error,
+            )
+            for kind, quota in quotas.items()
+        }
+
+    @staticmethod
+    def kind(method: str, url: str) -> str:
+        """Find which quota a request counts against.
+
+        Args:
+            method (str): The HTTP method, e.g. "get".
+            url (str): The URL of the request.
+
+        Returns:
+            str: "drive", "read" or "write".
+        """
+        if "/drive/" in url:
+            return "drive"
+        return "read" if method.lower() == "get" else "write"
+
+    def call(self, method: str, url: str, function, *args, **kwargs):
+        """Make a request, within the limits of its quota.
+
+        Args:
+            method (str): The HTTP method, e.g. "get".
+            url (str): The URL of the request.
+            function (Callable): Makes the request.
+            *args: The function's positional arguments.
+            **kwargs: The function's keyword arguments.
+
+        Returns:
+            The function's return value.
+        """
+        service = self.services[self.kind(method, url)]
+        return service.call(function, *args, **kwargs)
+
+    def report(self) -> str:
+        """Summarize the requests made.
+
+        Returns:
+            str: A one-line summary of the requests of each kind, and how many were retried.
+        """
+        counts = ", ".join(
+            f"{service.calls} {kind}" for kind, service in self.services.items()
+        )
+        failures = sum(service.failures for service in self.services.values())
+        return f"Google API requests: {counts}; {failures} failed or were retried."
+
+
+class ScheduledClient(gspread.Client):
+    """A gspread client which sends every request through a QuotaScheduler, and
+    keeps its access token and HTTP connections for the whole run.
+    """
+
+    def __init__(
+        self,
+        auth=None,
+        session: Optional[requests.Session] = None,
+        scheduler: Optional[QuotaScheduler] = None,
+        endpoint: Optional[str] = None,
+    ):
+        """
+        Args:
+            auth (optional): The credentials. Defaults to None, for a session which doesn't need them, e.g. with a fake endpoint.
+            session (Optional[requests.Session], optional): The HTTP session. Defaults to None, which makes one that authorizes requests with auth.
+            scheduler (Optional[QuotaScheduler], optional): The scheduler to send requests through. Defaults to None, which makes one with the default quotas.
+            endpoint (Optional[str], optional): A URL to send requests to instead of Google's, e.g. "http://127.0.0.1:8080" for a fake Sheets API. Defaults to None.
+        """
+        if auth is None and session is None:
+            session = requests.Session()
+        super().__init__(auth, session=session)
+        self.scheduler = scheduler if scheduler is not None else QuotaScheduler()
+        self.endpoint = endpoint
+
+    def request(self, method: str, endpoint: str, *args, **kwargs):
+        if self.endpoint is not None:
+            for host in API_HOSTS:
+                if endpoint.startswith(host):
+                    endpoint = self.endpoint + endpoint[len(host) :]
+        parent = super().request
+        return self.scheduler.call(
+            method, endpoint, parent, method, endpoint, *args, **kwargs
+        )
+
+
+_client = None
+_lock = threading.Lock()
+
+
+def get_client() -> ScheduledClient:
+    """Get the client shared by the whole run, authorizing it with the service
+    account credentials in creds.json on first use.
+
+    Returns:
+        ScheduledClient: The shared client.
+    """
+    global _client
+    with _lock:
+        if _client is None:
+            creds = ServiceAccountCredentials.from_json_keyfile_name(CREDS_FILE, SCOPES)
+            _client = ScheduledClient(auth=creds)
+        return _client
+
+
+def set_client(client: Optional[ScheduledClient]):
+    """Set the client shared by the whole run, e.g. one for a fake endpoint.
+
+    Args:
+        client (Optional[ScheduledClient]): The client, or None to authorize a new one on next use.
+    """
+    global _client
+    with _lock:
+        _client = client
+
+
+def report() -> Optional[str]:
+    """Summarize the requests made by the shared client.
+
+    Returns:
+        Optional[str]: A one-line summary, or None if the client wasn't used.
+    """
+    if _client is None:
+        return None
+    return _client.scheduler.report()
@@ -0,0 +1,133 @@
+# standard library imports
+from pathlib import Path
+import json
+import threading
+from typing import Optional
+
+# local imports
+from atomicfile import atomic_write
+
+
+class Journal:
+    """An append-only record of a grade's progress through makelists, so that an
+    interrupted run can be resumed without repeating finished work.
+
+    Each line is one JSON record: the options the run was started with, the
+    words chosen for the grade, each word as it is enriched, and finally that
+    the worksheet was written. A line left half-written by a crash is ignored.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        options: dict,
+        resume: bool = False,
+        path: str = Path(__file__).parent.parent.resolve() / "cache/journal/",
+    ):
+        """
+        Args:
+            name (str): The name of the journal, e.g. "grade_5".
+            options (dict): The options that affect the result. A journal started with different options isn't resumed.
+            resume (bool, optional): Whether to continue from an existing journal. Defaults to False, which starts a new one.
+            path (str, optional): The directory where journals are stored. Defaults to Path(__file__).parent.parent.resolve()/"cache/journal/".
+        """
+        self.filename = Path(path).resolve() / f"{name}.jsonl"
+        self.filename.parent.mkdir(parents=True, exist_ok=True)
+        self.words = None
+        self.forms = {}
+        self.entries = {}
+        self.written = False
+        self._lock = threading.Lock()
+        # compare the options as they will read back from the file
+        options = json.loads(json.dumps(options))
+        records = self.read() if resume else []
+        if records and records[0].get("options") != options:
+            print(
+                f"{self.filename.name} was started with other options; starting over."
+            )
+            records = []
+        for record in records[1:]:
+            if record["stage"] == "words":
+                self.words = [tuple(word) for word in record["words"]]
+                self.forms = record.get("forms", {})
+            elif record["stage"] == "entry":
+                self.entries[record["index"]] = record["entry"]
+            elif record["stage"] == "written":
+                self.written = True
+        # write the journal out again, without any half-written line at the end,
+        #  replacing the old one only once it is complete, so an interruption
+        #  doesn't lose the progress it had
+        with atomic_write(self.filename, "w", encoding="utf-8") as f:
+            for record in records or [{"stage": "start", "options": options}]:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file = open(self.filename, "a", encoding="utf-8")
+
+    def read(self) -> list[dict]:
+        """Read the records of the existing journal.
+
+        Returns:
+            list[dict]: The records, up to the first incomplete one.
+        """
+        records = []
+        try:
+            with open(self.filename, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        break
+        except FileNotFoundError:
+            pass
+        return records
+
+    def _append(self, record: dict):
+        with self._lock:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            # each record should survive the process dying straight after it
+            self._file.flush()
+
+    def record_words(self, words: list[tuple], forms: Optional[dict] = None):
+        """Record the words chosen for the grade.
+
+        Args:
+            words (list[tuple]): Tuples of each word and its frequency.
+            forms (Optional[dict], optional): The description of the forms each word was found in, if the words are base forms. Defaults to None.
+        """
+        self.words = [tuple(word) for word in words]
+        self.forms = forms or {}
+        record = {"stage": "words", "words": self.words}
+        if forms:
+            record["forms"] = self.forms
+        self._append(record)
+
+    def record_entry(self, index: int, entry: dict):
+        """Record a word which has been enriched. Safe to call from several threads.
+
+        Args:
+            index (int): The position of the word in the list.
+            entry (dict): The word's row, as made by make_wordlist().
+        """
+        with self._lock:
+            self.entries[index] = entry
+        self._append({"stage": "entry", "index": index, "entry": entry})
+
+    def record_written(self):
+        """Record that the grade's worksheet was written."""
+        self.written = True
+        self._append({"stage": "written"})
+
+    def close(self):
+        """Close the journal file."""
+        self._file.close()
+
+    def report(self) -> Optional[str]:
+        """Summarize what an earlier run had already done.
+
+        Returns:
+            Optional[str]: A one-line summary, or None if there was nothing to resume.
+        """
+        if self.written:
+            return "already written"
+        if self.words is None:
+            return None
+        return f"resuming with {len(self.entries)} of {len(self.words)} words done"
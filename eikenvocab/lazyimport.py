@@ -0,0 +1,54 @@
+# standard library imports
+import importlib
+import importlib.util
+import sys
+from types import ModuleType
+
+
+class LazyModule(ModuleType):
+    """Stands in for a module until one of its attributes is first used, then
+    imports it and passes every attribute lookup on to it.
+
+    The import goes through the normal import system, whose per-module locks
+    make threads that need the module at the same time wait for one import,
+    unlike importlib.util.LazyLoader, which isn't thread-safe before Python 3.12.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._module = None
+
+    def __getattr__(self, attr: str):
+        # only called for attributes that aren't set on the stand-in itself
+        module = self._module
+        if module is None:
+            module = self._module = importlib.import_module(self.__name__)
+        return getattr(module, attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded yet"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Import a module which is only loaded when one of its attributes is first used,
+    so that commands which never use it don't pay for loading it.
+
+    Submodules (e.g. "google.cloud.translate_v2") still load their parent packages
+    straight away, to check that the module exists; only the module itself is deferred.
+
+    Args:
+        name (str): The full name of the module, e.g. "gspread".
+
+    Raises:
+        ModuleNotFoundError: If there is no such module.
+
+    Returns:
+        ModuleType: The module, or a stand-in which loads it on first use.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    if importlib.util.find_spec(name) is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    return LazyModule(name)
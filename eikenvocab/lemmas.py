@@ -0,0 +1,226 @@
+# standard library imports
+from pathlib import Path
+from array import array
+from collections import Counter
+import gzip
+import hashlib
+import mmap
+import struct
+import threading
+import zlib
+
+# local imports
+from atomicfile import atomic_write
+from wordtable import WordTable
+
+# The packed table starts with a magic number, the number of slots and the number of words
+MAGIC = b"EVLEMMA1"
+HEADER = struct.Struct("=8sII")
+
+
+def pack(pairs: list[tuple[str, str]]) -> bytes:
+    """Pack words and their base forms into a hash table which can be searched in
+    place, without parsing it first.
+
+    After the header comes an open addressing table of slots, twice as many as
+    there are words, each holding 1 + the offset of a record, or 0 if it's empty.
+    The records follow: the lengths of the word and its base form, one byte each,
+    then the word and its base form in UTF-8.
+
+    Args:
+        pairs (list[tuple[str, str]]): Tuples of each word and its base form.
+
+    Returns:
+        bytes: The packed table.
+    """
+    pairs = [
+        (word.encode("utf-8"), lemma.encode("utf-8"))
+        for word, lemma in pairs
+        if len(word.encode("utf-8")) < 256 and len(lemma.encode("utf-8")) < 256
+    ]
+    size = 1
+    while size < 2 * len(pairs):
+        size *= 2
+    slots = array("I", [0]) * size
+    records = bytearray()
+    for word, lemma in pairs:
+        slot = zlib.crc32(word) & (size - 1)
+        while slots[slot]:
+            slot = (slot + 1) & (size - 1)
+        slots[slot] = len(records) + 1
+        records += bytes([len(word), len(lemma)]) + word + lemma
+    return HEADER.pack(MAGIC, size, len(pairs)) + slots.tobytes() + bytes(records)
+
+
+class LemmaIndex:
+    """Look up the base form (lemma) of English words, e.g. "went" -> "go", so the
+    inflections of a word can be counted, and looked up, as one word.
+
+    The bundled word list is packed into a hash table in the cache directory the
+    first time it is used, and memory-mapped from there after that, so loading it
+    costs next to nothing and each lookup takes constant time.
+    """
+
+    def __init__(
+        self,
+        source_path: str = Path(__file__).parent.resolve()
+        / "static/dictionaries/lemmas.tsv.gz",
+        path: str = Path(__file__).parent.parent.resolve() / "cache/lemmas/",
+    ):
+        """
+        Args:
+            source_path (str, optional): The word list, with a word and its base form on each line separated by a tab, optionally gzipped. Defaults to the bundled list.
+            path (str, optional): The directory where the packed table is stored. Defaults to Path(__file__).parent.parent.resolve()/"cache/lemmas/".
+        """
+        self.source_path = Path(source_path)
+        self.path = Path(path).resolve()
+        self._table = None
+        self._lock = threading.Lock()
+
+    @property
+    def table(self) -> tuple[mmap.mmap, memoryview, int]:
+        # map the table only when it is needed, and only once even if several
+        #  threads need it at the same time
+        if self._table is None:
+            with self._lock:
+                if self._table is None:
+                    self._table = self.load()
+        return self._table
+
+    def read_source(self) -> list[tuple[str, str]]:
+        """Read the word list.
+
+        Returns:
+            list[tuple[str, str]]: Tuples of each word and its base form.
+        """
+        opener = gzip.open if self.source_path.suffix == ".gz" else open
+        pairs = []
+        with opener(self.source_path, "rt", encoding="utf-8") as f:
+            for line in f:
+                line = line.split()
+                if len(line) == 2:
+                    pairs.append((line[0], line[1]))
+        return pairs
+
+    def load(self) -> tuple[mmap.mmap, memoryview, int]:
+        """Map the packed table into memory, packing the word list first if it
+        hasn't been already, or has changed since.
+
+        Returns:
+            tuple[mmap.mmap, memoryview, int]: The mapped table, its slots and the offset of its records.
+        """
+        digest = hashlib.sha256(self.source_path.read_bytes()).hexdigest()
+        packed = self.path / f"lemmas-{digest[:16]}.bin"
+        if not packed.exists():
+            with atomic_write(packed) as f:
+                f.write(pack(self.read_source()))
+        with open(packed, "rb") as f:
+            table = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, size, _ = HEADER.unpack_from(table)
+        if magic != MAGIC:
+            raise ValueError(f"{packed} isn't a packed lemma table.")
+        start = HEADER.size
+        slots = memoryview(table)[start : start + size * 4].cast("I")
+        return table, slots, start + size * 4
+
+    def lemma(self, word: str) -> str:
+        """Get the base form of a word.
+
+        Args:
+            word (str): A word, in lowercase.
+
+        Returns:
+            str: The word's base form, or the word itself if it is one or isn't in the list.
+        """
+        table, slots, records = self.table
+        key = word.encode("utf-8")
+        mask = len(slots) - 1
+        slot = zlib.crc32(key) & mask
+        while slots[slot]:
+            offset = records + slots[slot] - 1
+            word_length, lemma_length = table[offset], table[offset + 1]
+            start = offset + 2
+            if table[start : start + word_length] == key:
+                start += word_length
+                return table[start : start + lemma_length].decode("utf-8")
+            slot = (slot + 1) & mask
+        return word
+
+    def lemmatize_counts(self, counts: Counter) -> tuple[Counter, dict[str, Counter]]:
+        """Add up the frequencies of the forms of each word.
+
+        Args:
+            counts (Counter): The frequency of each word.
+
+        Returns:
+            tuple[Counter, dict[str, Counter]]: The frequency of each base form, in order of the first occurrence of any of its forms, and the frequency of each form of each base form.
+        """
+        lemma_counts = Counter()
+        forms = {}
+        for word, count in counts.items():
+            lemma = self.lemma(word)
+            lemma_counts[lemma] += count
+            forms.setdefault(lemma, Counter())[word] = count
+        return lemma_counts, forms
+
+
+def describe_forms(forms: Counter) -> str:
+    """Describe the forms a word was found in, for the wordlist.
+
+    Args:
+        forms (Counter): The frequency of each form of the word.
+
+    Returns:
+        str: The forms and their frequencies, most frequent first, e.g. "go (40), went (12)".
+    """
+    return ", ".join(f"{form} ({count})" for form, count in forms.most_common())
+
+
+def add_forms(wordlist: WordTable, forms: dict[str, str]) -> WordTable:
+    """Add the forms each word was found in to a wordlist, as its last column.
+
+    Args:
+        wordlist (WordTable): A wordlist, as from wordlists.make_wordlist().
+        forms (dict[str, str]): The description of each word's forms, from describe_forms().
+
+    Returns:
+        WordTable: The wordlist, with a "Forms" field.
+    """
+    return wordlist.with_column(
+        "Forms", [forms.get(word, "") for word in wordlist.column("Word")]
+    )
+
+
+def report(grade: str, words: list[tuple], forms: dict[str, Counter]) -> str:
+    """Summarize what counting base forms saved for a grade.
+
+    Args:
+        grade (str): The grade.
+        words (list[tuple]): The base forms chosen for the grade, with their frequencies.
+        forms (dict[str, Counter]): The frequency of each form of each base form.
+
+    Returns:
+        str: A one-line summary of the rows and lookups saved.
+    """
+    covered = sum(len(forms.get(word, ())) or 1 for word, _ in words)
+    saved = covered - len(words)
+    # each row needs a pronunciation, a translation and a reading of the translation
+    return (
+        f"Grade {grade}: {len(words)} base forms cover {covered} words, "
+        f"saving {saved} rows and up to {3 * saved} lookups."
+    )
+
+
+_index = None
+
+
+def get_index() -> LemmaIndex:
+    """Get the lemma index shared by the whole run, loading it on first use.
+
+    Returns:
+        LemmaIndex: The shared index.
+    """
+    global _index
+    if _index is None:
+        _index = LemmaIndex()
+    return _index
@@ -0,0 +1,115 @@
+# standard library imports
+from pathlib import Path
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+import queue
+import threading
+from typing import Iterable, Optional
+
+# local imports
+import tests
+import wordlists
+from textcache import TextCache
+
+# Marks the end of the downloads in the queue
+_DONE = object()
+
+
+def download_and_count(
+    grades: list[str],
+    path: str,
+    years: Optional[Iterable[int]] = None,
+    workers: int = 8,
+    jobs: Optional[int] = None,
+    recheck: bool = False,
+    cache: Optional[TextCache] = None,
+    base_url: str = tests.BASE_URL,
+    queue_size: int = 16,
+) -> dict[str, Counter]:
+    """Download the test PDFs of some grades and count their words, with downloading,
+    text extraction and counting overlapped: each PDF is extracted as soon as it
+    has downloaded, and its text is counted as soon as it has been extracted.
+
+    Downloads run in a background thread and are handed over through a bounded
+    queue, and at most jobs * 2 extractions are in flight at once, so only a few
+    PDFs' text is ever held in memory.
+
+    Args:
+        grades (list[str]): A list of the grades to include.
+        path (str): The local path where the files will be saved, in a folder per grade.
+        years (Optional[Iterable[int]], optional): The years of tests to include. Defaults to None, which uses tests.DEFAULT_YEARS.
+        workers (int, optional): The maximum number of downloads to run at once. Defaults to 8.
+        jobs (Optional[int], optional): The number of worker processes to extract with. Defaults to None, which extracts in this process.
+        recheck (bool, optional): Whether to ask the server if files that were already downloaded have changed. Defaults to False.
+        cache (Optional[TextCache], optional): A cache of previously extracted text. Defaults to None.
+        base_url (str, optional): The URL the test paths are relative to. Defaults to tests.BASE_URL.
+        queue_size (int, optional): The most downloaded files waiting to be extracted. Defaults to 16.
+
+    Returns:
+        dict[str, Counter]: The frequency of each word in each grade's tests.
+    """
+    downloads = list(
+        tests.eiken_test_urls(grades=grades, path=path, years=years, base_url=base_url)
+    )
+    grade_folders = {f"grade_{grade}": grade for grade in grades}
+    paths = queue.Queue(maxsize=queue_size)
+    errors = []
+
+    def download():
+        try:
+            for file in tests.download_files(
+                downloads, workers=workers, recheck=recheck
+            ):
+                paths.put(file)
+        except BaseException as error:
+            errors.append(error)
+        finally:
+            paths.put(_DONE)
+
+    downloader = threading.Thread(target=download, daemon=True)
+    downloader.start()
+
+    file_counts = {}
+    keys = {}
+
+    def count(file: Path, text: str):
+        if cache is not None:
+            cache.put(keys[file], text)
+        file_counts[file] = wordlists.count_words([text])
+
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs and jobs > 1 else None
+    pending = deque()
+    try:
+        while True:
+            file = paths.get()
+            if file is _DONE:
+                break
+            if cache is not None:
+                keys[file] = cache.key(file, drop_first_and_last_pages=True)
+                text = cache.get(keys[file])
+                if text is not None:
+                    file_counts[file] = wordlists.count_words([text])
+                    continue
+            if executor is None:
+                count(file, wordlists.pdf_to_string(file))
+                continue
+            pending.append((file, executor.submit(wordlists.pdf_to_string, file)))
+            # don't let extracted text pile up ahead of the counting
+            if len(pending) >= jobs * 2:
+                done, future = pending.popleft()
+                count(done, future.result())
+        while pending:
+            done, future = pending.popleft()
+            count(done, future.result())
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    downloader.join()
+    if errors:
+        raise errors[0]
+
+    # add up each grade's files in name order, so ties are ranked the same every run
+    counts = {grade: Counter() for grade in grades}
+    for file in sorted(file_counts):
+        counts[grade_folders[file.parent.name]].update(file_counts[file])
+    return counts
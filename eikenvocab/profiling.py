@@ -0,0 +1,210 @@
+# standard library imports
+from pathlib import Path
+from contextlib import contextmanager, nullcontext
+from collections import defaultdict
+import json
+import os
+import threading
+import time
+from typing import Iterator, Optional
+
+
+class Profiler:
+    """Where the time of a run goes: wall and CPU time per stage, calls and
+    latencies per remote service, bytes downloaded and cache hit rates.
+
+    A disabled profiler records nothing, so instrumented code costs next to
+    nothing when profiling is off.
+    """
+
+    def __init__(self, command: str = "", enabled: bool = True):
+        """
+        Args:
+            command (str, optional): The command being profiled, for the summary. Defaults to "".
+            enabled (bool, optional): Whether to record anything. Defaults to True.
+        """
+        self.command = command
+        self.enabled = enabled
+        self.stages = defaultdict(lambda: {"count": 0, "wall": 0.0, "cpu": 0.0})
+        self.services = defaultdict(
+            lambda: {"calls": 0, "failures": 0, "latency": 0.0, "max_latency": 0.0}
+        )
+        self.bytes = defaultdict(int)
+        self.caches = {}
+        self.events = []
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._cpu_origin = time.process_time()
+
+    def _event(self, name: str, category: str, start: float, end: float, args: dict):
+        # a complete event in the Chrome trace format, in microseconds
+        self.events.append(
+            {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (start - self._origin) * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": args,
+            }
+        )
+
+    def stage(self, name: str, **args):
+        """Time a stage of the run, as a context manager. Stages may nest.
+
+        Args:
+            name (str): The name of the stage, e.g. "extract".
+            **args: Details to show in the trace, e.g. grade="5".
+
+        Returns:
+            A context manager around the stage.
+        """
+        if not self.enabled:
+            return nullcontext()
+        return self._stage(name, args)
+
+    @contextmanager
+    def _stage(self, name: str, args: dict) -> Iterator[None]:
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            cpu = time.process_time() - cpu_start
+            with self._lock:
+                stage = self.stages[name]
+                stage["count"] += 1
+                stage["wall"] += end - start
+                stage["cpu"] += cpu
+                self._event(name, "stage", start, end, args)
+
+    def call(self, service: str, start: float, failed: bool = False):
+        """Record a call to a remote service which has just finished.
+
+        Args:
+            service (str): The name of the service.
+            start (float): When the call started, from time.perf_counter().
+            failed (bool, optional): Whether the call raised an error. Defaults to False.
+        """
+        if not self.enabled:
+            return
+        end = time.perf_counter()
+        with self._lock:
+            stats = self.services[service]
+            stats["calls"] += 1
+            stats["failures"] += failed
+            stats["latency"] += end - start
+            stats["max_latency"] = max(stats["max_latency"], end - start)
+            self._event(service, "remote", start, end, {"failed": failed})
+
+    def add_bytes(self, name: str, count: int):
+        """Count bytes transferred.
+
+        Args:
+            name (str): What was transferred, e.g. "downloaded".
+            count (int): The number of bytes.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self.bytes[name] += count
+
+    def cache(self, name: str, hits: int, misses: int):
+        """Record how well a cache did over the run.
+
+        Args:
+            name (str): The name of the cache.
+            hits (int): The number of lookups it answered.
+            misses (int): The number of lookups it couldn't.
+        """
+        if not self.enabled:
+            return
+        self.caches[name] = {"hits": hits, "misses": misses}
+
+    def summary(self) -> dict:
+        """Summarize the run.
+
+        Returns:
+            dict: The totals, per stage, service and cache.
+        """
+        services = {}
+        for name, stats in self.services.items():
+            services[name] = dict(stats, mean_latency=stats["latency"] / stats["calls"])
+        caches = {}
+        for name, stats in self.caches.items():
+            lookups = stats["hits"] + stats["misses"]
+            caches[name] = dict(
+                stats, hit_rate=stats["hits"] / lookups if lookups else None
+            )
+        return {
+            "command": self.command,
+            "wall": time.perf_counter() - self._origin,
+            "cpu": time.process_time() - self._cpu_origin,
+            "stages": dict(self.stages),
+            "services": services,
+            "bytes": dict(self.bytes),
+            "caches": caches,
+        }
+
+    def write(
+        self, summary_path: Optional[str] = None, trace_path: Optional[str] = None
+    ):
+        """Write the summary as JSON and the stages and calls as a Chrome trace,
+        which can be opened in chrome://tracing or Perfetto.
+
+        Args:
+            summary_path (Optional[str], optional): Where to write the summary. Defaults to None, which doesn't.
+            trace_path (Optional[str], optional): Where to write the trace. Defaults to None, which doesn't.
+        """
+        if summary_path is not None:
+            with open(summary_path, "w", encoding="utf-8") as f:
+                json.dump(self.summary(), f, indent=2)
+            print(f"Wrote the profile to {Path(summary_path).resolve()}")
+        if trace_path is not None:
+            with open(trace_path, "w", encoding="utf-8") as f:
+                json.dump({"traceEvents": self.events}, f)
+            print(f"Wrote the trace to {Path(trace_path).resolve()}")
+
+
+_profiler = Profiler(enabled=False)
+
+
+def get_profiler() -> Profiler:
+    """Get the profiler of the current run, which is disabled unless profiling was asked for.
+
+    Returns:
+        Profiler: The profiler.
+    """
+    return _profiler
+
+
+@contextmanager
+def profile(
+    command: str,
+    summary_path: Optional[str] = None,
+    trace_path: Optional[str] = None,
+) -> Iterator[Profiler]:
+    """Profile a command, if a summary or trace was asked for, writing them when
+    it ends, even if it fails.
+
+    Args:
+        command (str): The name of the command.
+        summary_path (Optional[str], optional): Where to write the JSON summary. Defaults to None.
+        trace_path (Optional[str], optional): Where to write the Chrome trace. Defaults to None.
+
+    Yields:
+        Iterator[Profiler]: The profiler, which is disabled if neither path was given.
+    """
+    global _profiler
+    enabled = summary_path is not None or trace_path is not None
+    _profiler = Profiler(command=command, enabled=enabled)
+    try:
+        with _profiler.stage(command):
+            yield _profiler
+    finally:
+        if enabled:
+            _profiler.write(summary_path, trace_path)
+        _profiler = Profiler(enabled=False)
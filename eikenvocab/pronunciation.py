@@ -0,0 +1,408 @@
+# standard library imports
+from pathlib import Path
+import gzip
+import re
+import threading
+from typing import Optional
+
+# The ARPAbet phonemes used by the CMU Pronouncing Dictionary
+VOWELS = [
+    "AA", "AE", "AH", "AO", "AW", "AY", "EH", "ER",
+    "EY", "IH", "IY", "OW", "OY", "UH", "UW",
+]  # fmt: skip
+CONSONANTS = [
+    "B", "CH", "D", "DH", "F", "G", "HH", "JH", "K", "L", "M", "N",
+    "NG", "P", "R", "S", "SH", "T", "TH", "V", "W", "Y", "Z", "ZH",
+]  # fmt: skip
+# Each phoneme (vowels with their stress, 0-2) is stored as one byte
+SYMBOLS = [f"{vowel}{stress}" for vowel in VOWELS for stress in "012"] + CONSONANTS
+SYMBOL_IDS = {symbol: index for index, symbol in enumerate(SYMBOLS)}
+
+# Each vowel sounds like one of the five Japanese vowels, maybe followed by more kana
+VOWEL_SOUNDS = {
+    "AA": ("a", ""),
+    "AE": ("a", ""),
+    "AH": ("a", ""),
+    "AO": ("o", ""),
+    "AW": ("a", "ウ"),
+    "AY": ("a", "イ"),
+    "EH": ("e", ""),
+    "ER": ("a", "ー"),
+    "EY": ("e", "ー"),
+    "IH": ("i", ""),
+    "IY": ("i", "ー"),
+    "OW": ("o", "ー"),
+    "OY": ("o", "イ"),
+    "UH": ("u", ""),
+    "UW": ("u", "ー"),
+}
+# How a vowel followed by an R that doesn't start a new syllable is written, e.g.
+#  "hair" is ヘア, "hear" is ヒア and "poor" is プア; other vowels are lengthened
+R_COLORED = {
+    "EH": "ア", "IH": "ア", "IY": "ア", "UH": "ア", "UW": "ア", "AY": "ア", "AW": "ア",
+}  # fmt: skip
+# Words ending in these are written with ア after their "or" sound, e.g. "door" is
+#  ドア and "store" ストア, while "for" and "four" are フォー
+OR_AS_A = ("oor", "ore", "oar")
+SHORT_VOWELS = {"AA", "AE", "AH", "EH", "IH", "UH"}
+# Consonants whose sound is doubled (with a small tsu) after a short vowel at the
+#  end of a word, e.g. "cup" and "bed", but not "club"
+VOICELESS_STOPS = {"P", "T", "K", "CH"}
+VOICED_STOPS = {"D", "G", "JH"}
+# In the middle of a word, only these spellings are doubled, e.g. "happy" and
+#  "kitchen", while "second" isn't; nor is "tt", which is usually a flap, e.g. "letter"
+DOUBLE_SPELLINGS = {"P": ("pp",), "K": ("cc", "kk"), "CH": ("tch",)}
+# Vowel letters which are often two vowel sounds, e.g. "piano" and "video"
+HIATUS_SPELLINGS = ("ia", "io", "ea", "eo", "ua", "uo")
+# How an unstressed "uh" (schwa) is written, following its spelling, e.g. "lemon"
+#  is レモン and "family" ファミリー; other spellings are written with a, e.g. "salad"
+SCHWA_SPELLINGS = {
+    "a": "a", "e": "e", "i": "i", "o": "o", "io": "o", "eo": "o", "ai": "e",
+}  # fmt: skip
+
+# The kana for each consonant followed by a, i, u, e and o
+SYLLABLES = {
+    "": "アイウエオ",
+    "B": ["バ", "ビ", "ブ", "ベ", "ボ"],
+    "CH": ["チャ", "チ", "チュ", "チェ", "チョ"],
+    "D": ["ダ", "ディ", "ドゥ", "デ", "ド"],
+    "DH": ["ザ", "ジ", "ズ", "ゼ", "ゾ"],
+    "F": ["ファ", "フィ", "フ", "フェ", "フォ"],
+    "G": ["ガ", "ギ", "グ", "ゲ", "ゴ"],
+    "HH": ["ハ", "ヒ", "フ", "ヘ", "ホ"],
+    "JH": ["ジャ", "ジ", "ジュ", "ジェ", "ジョ"],
+    "K": ["カ", "キ", "ク", "ケ", "コ"],
+    "L": ["ラ", "リ", "ル", "レ", "ロ"],
+    "M": ["マ", "ミ", "ム", "メ", "モ"],
+    "N": ["ナ", "ニ", "ヌ", "ネ", "ノ"],
+    "NG": ["ンガ", "ンギ", "ング", "ンゲ", "ンゴ"],
+    "P": ["パ", "ピ", "プ", "ペ", "ポ"],
+    "R": ["ラ", "リ", "ル", "レ", "ロ"],
+    "S": ["サ", "シ", "ス", "セ", "ソ"],
+    "SH": ["シャ", "シ", "シュ", "シェ", "ショ"],
+    "T": ["タ", "ティ", "トゥ", "テ", "ト"],
+    "TH": ["サ", "シ", "ス", "セ", "ソ"],
+    "V": ["バ", "ビ", "ブ", "ベ", "ボ"],
+    "W": ["ワ", "ウィ", "ウ", "ウェ", "ウォ"],
+    "Y": ["ヤ", "イ", "ユ", "イェ", "ヨ"],
+    "Z": ["ザ", "ジ", "ズ", "ゼ", "ゾ"],
+    "ZH": ["ジャ", "ジ", "ジュ", "ジェ", "ジョ"],
+}
+VOWEL_INDEX = {"a": 0, "i": 1, "u": 2, "e": 3, "o": 4}
+# The small kana used for a consonant followed by a Y sound, e.g. "cute"
+SMALL_VOWELS = {"a": "ャ", "i": "ィ", "u": "ュ", "e": "ェ", "o": "ョ"}
+# How consonants with no vowel after them are written
+BARE_CONSONANTS = {
+    "CH": "チ",
+    "D": "ド",
+    "JH": "ジ",
+    "M": "ム",
+    "N": "ン",
+    "NG": "ング",
+    "SH": "シュ",
+    "T": "ト",
+    "ZH": "ジュ",
+    "Y": "イ",
+}
+
+
+def decode(phonemes: bytes) -> list[str]:
+    """Turn a pronunciation stored as bytes back into ARPAbet symbols.
+
+    Args:
+        phonemes (bytes): The stored pronunciation.
+
+    Returns:
+        list[str]: The ARPAbet symbols, e.g. ["K", "AE1", "T"].
+    """
+    return [SYMBOLS[phoneme] for phoneme in phonemes]
+
+
+def phonemes_to_katakana(phonemes: list[str], spelling: str = "") -> str:
+    """Write an ARPAbet pronunciation in katakana, the way English loanwords usually are.
+
+    Args:
+        phonemes (list[str]): The ARPAbet symbols, with vowel stress, e.g. ["K", "AE1", "T"].
+        spelling (str, optional): The word's spelling, used as a hint for sounds which Japanese writes differently depending on it. Defaults to "".
+
+    Returns:
+        str: The katakana pronunciation.
+    """
+    sounds = _split_sounds(
+        [(phoneme.rstrip("012"), phoneme[-1]) for phoneme in phonemes], spelling
+    )
+
+    def is_vowel(index):
+        return index < len(sounds) and sounds[index][0] in VOWEL_SOUNDS
+
+    positions = [index for index in range(len(sounds)) if is_vowel(index)]
+    letters = _vowel_letters(positions, spelling)
+
+    def vowel(index):
+        name, stress = sounds[index]
+        base, extra = VOWEL_SOUNDS[name]
+        spelled = letters.get(index)
+        short = name in SHORT_VOWELS
+        # "hot" is ホット, not ハット; follow the spelling
+        if name == "AA" and "o" in (spelled or spelling):
+            if "a" not in (spelled or spelling):
+                base = "o"
+        # an "aw" sound is long unless it is spelled with an o, e.g. "water" and
+        #  "ball" are ウォーター and ボール, but "dog" is ドッグ
+        if name == "AO":
+            short = spelled == "o"
+            if spelled is not None and not short:
+                extra = "ー"
+        if spelled is not None and stress == "0":
+            if name == "AH":
+                base = SCHWA_SPELLINGS.get(spelled, "a")
+            # "ticket" is チケット, but "begin" is ビギン
+            if name == "IH" and spelled in ("a", "e") and index != positions[0]:
+                base = "e"
+            # "orange" is オレンジ and "village" ビレッジ
+            if name in ("AH", "IH") and spelled == "a" and spelling.endswith("ge"):
+                base = "e"
+            # "video" is ビデオ
+            elif name == "IY" and spelled == "e" and is_vowel(index + 1):
+                base, extra = "e", ""
+        # a long vowel which isn't stressed, spelled with one letter, is written
+        #  short, e.g. "piano" is ピアノ and "hotel" ホテル
+        if name in ("IY", "OW") and spelled in ("i", "o") and stress != "1":
+            extra = ""
+        return name, base, extra, short
+
+    kana = []
+    index = 0
+    while index < len(sounds):
+        name = sounds[index][0]
+        if is_vowel(index):
+            consonant = ""
+        else:
+            consonant = name
+            # a consonant then a Y sound, e.g. "music" or "cute"
+            if (
+                index + 2 < len(sounds)
+                and sounds[index + 1][0] == "Y"
+                and is_vowel(index + 2)
+                and consonant in SYLLABLES
+                and consonant not in ("Y", "W")
+            ):
+                vowel_name, base, extra, _ = vowel(index + 2)
+                kana.append(SYLLABLES[consonant][1][0] + SMALL_VOWELS[base] + extra)
+                index += 3
+                index = _r_coloring(sounds, index, vowel_name, kana, is_vowel, spelling)
+                continue
+            if not is_vowel(index + 1):
+                kana.append(_bare_consonant(sounds, index))
+                index += 1
+                continue
+            index += 1
+        vowel_name, base, extra, short = vowel(index)
+        stress = sounds[index][1]
+        syllable = SYLLABLES[consonant][VOWEL_INDEX[base]]
+        # a K or G sound then a short a in a closed syllable, e.g. "cat" is キャット
+        #  and "candy" キャンディー, but "camera" is カメラ
+        if (
+            consonant in ("K", "G")
+            and vowel_name == "AE"
+            and not is_vowel(index + 1)
+            and not is_vowel(index + 2)
+        ):
+            syllable = SYLLABLES[consonant][1][0] + SMALL_VOWELS["a"]
+        kana.append(syllable + extra)
+        index += 1
+        colored = _r_coloring(sounds, index, vowel_name, kana, is_vowel, spelling)
+        # an R-colored vowel is long, so the consonant after it isn't doubled
+        if colored == index and short:
+            if _is_geminate(sounds, index, stress, spelling):
+                kana.append("ッ")
+        index = colored
+    return "".join(kana)
+
+
+def _split_sounds(sounds, spelling) -> list[tuple[str, str]]:
+    # rewrite the sounds which Japanese hears differently from how CMUdict has them
+    split = []
+    for index, (name, stress) in enumerate(sounds):
+        following = sounds[index + 1][0] if index + 1 < len(sounds) else None
+        if name == "AW" and following == "ER":
+            # "hour" and "power" are アワー and パワー
+            split += [("AH", stress), ("W", "")]
+        elif name == "ER" and following in VOWEL_SOUNDS:
+            # the R starts the next syllable, e.g. "camera" is カメラ
+            split += [("AH", stress), ("R", "")]
+        else:
+            split.append((name, stress))
+    # "table" and "apple" end in an L without a vowel, テーブル and アップル
+    if (
+        len(split) > 2
+        and split[-2] == ("AH", "0")
+        and split[-1][0] == "L"
+        and split[-3][0] not in VOWEL_SOUNDS
+        and re.search("[^aeiouy]le$", spelling)
+    ):
+        del split[-2]
+    return split
+
+
+def _vowel_letters(positions, spelling) -> dict[int, str]:
+    # when the spelling has as many groups of vowel letters as the word has vowel
+    #  sounds, each sound's letters, e.g. "o", "u" and "e" in "computer"
+    groups = re.findall("[aeiouy]+w?", spelling)
+    # a silent e, e.g. "cake" or "orange"
+    if len(groups) > len(positions) and re.search("[^aeiouy]e$", spelling):
+        groups.pop()
+    missing = len(positions) - len(groups)
+    if missing > 0 and sum(group in HIATUS_SPELLINGS for group in groups) == missing:
+        groups = [
+            letter
+            for group in groups
+            for letter in (group if group in HIATUS_SPELLINGS else [group])
+        ]
+    if len(groups) != len(positions):
+        return {}
+    return dict(zip(positions, groups))
+
+
+def _r_coloring(sounds, index, vowel_name, kana, is_vowel, spelling) -> int:
+    # an R after a vowel, which doesn't start the next syllable, changes the vowel
+    if (
+        index >= len(sounds)
+        or sounds[index][0] != "R"
+        or is_vowel(index + 1)
+        or vowel_name == "ER"
+    ):
+        return index
+    if vowel_name in ("IH", "IY") and kana[-1] in ("イ", "イー"):
+        # "ear" and "year" are イヤー
+        kana[-1] = "イヤー"
+    elif vowel_name in R_COLORED or (
+        vowel_name == "AO" and index + 1 == len(sounds) and spelling.endswith(OR_AS_A)
+    ):
+        # the vowel isn't lengthened as well, e.g. "hear" is ヒア, not ヒーア
+        kana[-1] = kana[-1].removesuffix("ー") + R_COLORED.get(vowel_name, "ア")
+    elif not kana[-1].endswith("ー"):
+        kana.append("ー")
+    return index + 1
+
+
+def _is_geminate(sounds, index, stress, spelling) -> bool:
+    # whether the consonant at index is doubled, after a short vowel with this stress
+    if index >= len(sounds):
+        return False
+    name = sounds[index][0]
+    # at the end of the word, or before a final S, e.g. "box" or "dogs"
+    at_end = [following for following, _ in sounds[index + 1 :]] in ([], ["S"], ["Z"])
+    if name in VOICELESS_STOPS:
+        if at_end:
+            return True
+        return stress == "1" and any(
+            letters in spelling for letters in DOUBLE_SPELLINGS.get(name, ())
+        )
+    return name in VOICED_STOPS and at_end and stress == "1"
+
+
+def _bare_consonant(sounds, index) -> str:
+    name = sounds[index][0]
+    following = sounds[index + 1][0] if index + 1 < len(sounds) else None
+    if name == "NG" and following in ("K", "G"):
+        return "ン"
+    if name == "M" and following in ("B", "P", "M"):
+        return "ン"
+    if name in BARE_CONSONANTS:
+        return BARE_CONSONANTS[name]
+    return SYLLABLES[name][VOWEL_INDEX["u"]]
+
+
+class PronunciationEngine:
+    """Convert English words to katakana without the network, using the bundled
+    CMU Pronouncing Dictionary and rules for writing its phonemes in kana.
+    """
+
+    def __init__(
+        self,
+        dictionary_path: str = Path(__file__).parent.resolve()
+        / "static/dictionaries/cmudict.dict.gz",
+    ):
+        """
+        Args:
+            dictionary_path (str, optional): The pronunciation dictionary, in CMUdict format, optionally gzipped. Defaults to the bundled CMUdict.
+        """
+        self.dictionary_path = Path(dictionary_path)
+        self._index = None
+        self._lock = threading.Lock()
+
+    @property
+    def index(self) -> dict[str, bytes]:
+        # the dictionary takes a moment to load, so only load it when it is needed,
+        #  and only once even if several threads need it at the same time
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = self.load()
+        return self._index
+
+    def load(self) -> dict[str, bytes]:
+        """Load the pronunciation dictionary into a compact index, keeping the first
+        pronunciation of each word with one byte per phoneme.
+
+        Returns:
+            dict[str, bytes]: The pronunciation of each word.
+        """
+        opener = gzip.open if self.dictionary_path.suffix == ".gz" else open
+        index = {}
+        with opener(self.dictionary_path, "rt", encoding="utf-8") as f:
+            for line in f:
+                # lines look like "word(2) W ER1 D  # comment"
+                line = line.split("#", 1)[0].split()
+                if len(line) < 2:
+                    continue
+                word = line[0].lower()
+                if "(" in word or word in index:
+                    continue
+                try:
+                    index[word] = bytes(SYMBOL_IDS[symbol] for symbol in line[1:])
+                except KeyError:
+                    continue
+        return index
+
+    def phonemes(self, word: str) -> Optional[list[str]]:
+        """Get the ARPAbet pronunciation of a word.
+
+        Args:
+            word (str): An English word.
+
+        Returns:
+            Optional[list[str]]: The ARPAbet symbols, or None if the word isn't in the dictionary.
+        """
+        phonemes = self.index.get(word.lower())
+        return None if phonemes is None else decode(phonemes)
+
+    def convert(self, word: str) -> Optional[str]:
+        """Transliterate an English word into its katakana pronunciation equivalent.
+
+        Args:
+            word (str): An English word.
+
+        Returns:
+            Optional[str]: A katakana transliteration, or None if the word isn't in the dictionary.
+        """
+        phonemes = self.phonemes(word)
+        if phonemes is None:
+            return None
+        return phonemes_to_katakana(phonemes, spelling=word.lower())
+
+
+_engine = None
+
+
+def get_engine() -> PronunciationEngine:
+    """Get the pronunciation engine shared by the whole run, making it on first use.
+
+    Returns:
+        PronunciationEngine: The shared engine.
+    """
+    global _engine
+    if _engine is None:
+        _engine = PronunciationEngine()
+    return _engine
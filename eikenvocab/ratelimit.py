@@ -0,0 +1,118 @@
+# standard library imports
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+# local imports
+import profiling
+
+
+class TokenBucket:
+    """A token bucket rate limiter, safe to share between threads."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate (float): The number of tokens added per second.
+            capacity (Optional[float], optional): The most tokens the bucket can hold, i.e. the largest burst. Defaults to None, which uses the rate.
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1):
+        """Take tokens from the bucket, waiting until there are enough.
+
+        Args:
+            tokens (float, optional): The number of tokens to take. Defaults to 1.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class RemoteService:
+    """Calls to one remote service, with a concurrency limit, a rate limit
+    and retries with exponential backoff on transient failures.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int = 4,
+        rate: float = 5,
+        burst: Optional[float] = None,
+        retries: int = 5,
+        backoff: float = 1,
+        max_backoff: float = 60,
+        is_transient: Callable[[Exception], bool] = lambda error: False,
+    ):
+        """
+        Args:
+            name (str): The name of the service, for messages.
+            max_concurrency (int, optional): The most calls that may be in flight at once. Defaults to 4.
+            rate (float, optional): The most calls per second, on average. Defaults to 5.
+            burst (Optional[float], optional): The most calls that may be made at once after a pause. Defaults to None, which uses the rate.
+            retries (int, optional): How many times to retry a call that failed transiently. Defaults to 5.
+            backoff (float, optional): The wait before the first retry, in seconds; it doubles for each retry after that. Defaults to 1.
+            max_backoff (float, optional): The longest wait between retries, in seconds. Defaults to 60.
+            is_transient (Callable[[Exception], bool], optional): Whether an error is worth retrying. Defaults to never.
+        """
+        self.name = name
+        self.bucket = TokenBucket(rate=rate, capacity=burst)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.is_transient = is_transient
+        self.calls = 0
+        self.failures = 0
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+
+    def call(self, function: Callable, *args, **kwargs):
+        """Call a function which uses the service, within its limits.
+
+        Args:
+            function (Callable): The function to call.
+            *args: The function's positional arguments.
+            **kwargs: The function's keyword arguments.
+
+        Returns:
+            The function's return value.
+        """
+        profiler = profiling.get_profiler()
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            with self._lock:
+                self.calls += 1
+            try:
+                with self._semaphore:
+                    start = time.perf_counter()
+                    result = function(*args, **kwargs)
+                profiler.call(self.name, start)
+                return result
+            except Exception as error:
+                profiler.call(self.name, start, failed=True)
+                with self._lock:
+                    self.failures += 1
+                if attempt >= self.retries or not self.is_transient(error):
+                    raise
+                # full jitter, so that threads which failed together don't retry together
+                delay = min(self.max_backoff, self.backoff * 2**attempt)
+                delay = random.uniform(0, delay)
+                print(f"{self.name} failed ({error}); retrying in {delay:.1f}s ...")
+                time.sleep(delay)
+                attempt += 1
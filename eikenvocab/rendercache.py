@@ -0,0 +1,82 @@
+# standard library imports
+from pathlib import Path
+import hashlib
+import json
+
+# local imports
+from filecache import FileCache
+
+
+class RenderCache(FileCache):
+    """An on-disk cache of rendered chunks of flashcard PDFs.
+
+    Entries are keyed by a hash of the cards in the chunk, plus the templates
+    and static files (CSS, fonts and images) they are rendered with, so a
+    chunk is only rendered again when something that affects it changes.
+    """
+
+    suffix = ".pdf"
+
+    def __init__(
+        self,
+        path: str = Path(__file__).parent.parent.resolve() / "cache/render/",
+        max_bytes: int = 512 * 1024 * 1024,
+    ):
+        """
+        Args:
+            path (str, optional): The directory where rendered chunks are stored. Defaults to Path(__file__).parent.parent.resolve()/"cache/render/".
+            max_bytes (int, optional): The total size the cache is trimmed to on eviction. Defaults to 512 MiB.
+        """
+        super().__init__(path, max_bytes=max_bytes)
+        self.pages_reused = 0
+        self.pages_rendered = 0
+        self._fingerprint = None
+
+    @property
+    def fingerprint(self) -> str:
+        # hash the templates and static files once per run
+        if self._fingerprint is None:
+            package = Path(__file__).parent.resolve()
+            digest = hashlib.sha256()
+            files = sorted(
+                file
+                for folder in (
+                    "templates",
+                    "static/css",
+                    "static/fonts",
+                    "static/images",
+                )
+                for file in (package / folder).glob("*")
+                if file.is_file()
+            )
+            for file in files:
+                digest.update(str(file.relative_to(package)).encode("utf-8"))
+                digest.update(file.read_bytes())
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def key(self, grade: str, chunk: list[tuple[dict, dict]]) -> str:
+        """Make a cache key for a chunk of cards.
+
+        Args:
+            grade (str): The grade level of the content, as used for labels.
+            chunk (list[tuple[dict, dict]]): Part of the paired wordlist.
+
+        Returns:
+            str: A hex digest identifying the chunk and how it is rendered.
+        """
+        digest = hashlib.sha256(self.fingerprint.encode("utf-8"))
+        digest.update(grade.encode("utf-8"))
+        digest.update(json.dumps(chunk, sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
+
+    def report(self) -> str:
+        """Summarize how many pages were reused.
+
+        Returns:
+            str: A one-line summary of the pages reused and rendered.
+        """
+        return (
+            f"Render cache: {self.pages_reused} pages reused, "
+            f"{self.pages_rendered} pages rendered."
+        )
@@ -0,0 +1,116 @@
+# standard library imports
+from __future__ import annotations
+from pathlib import Path
+import json
+import re
+from typing import Callable, Optional
+
+# local imports
+from atomicfile import atomic_write
+from lazyimport import lazy_import
+
+# third party imports, loaded on first use
+gspread = lazy_import("gspread")
+googleapi = lazy_import("googleapi")
+
+
+class SheetSnapshot:
+    """A local copy of the grade worksheets of a Google Sheets document.
+
+    All of the requested worksheets are fetched together in one request, and
+    only when the document has been modified since the last fetch.
+    """
+
+    def __init__(
+        self,
+        sheetname: str = "Eiken Vocabulary (final)",
+        path: str = Path(__file__).parent.parent.resolve() / "cache/snapshots/",
+        offline: bool = False,
+    ):
+        """
+        Args:
+            sheetname (str, optional): The name of the Google Sheets document. Defaults to "Eiken Vocabulary (final)".
+            path (str, optional): The directory where snapshots are stored. Defaults to Path(__file__).parent.parent.resolve()/"cache/snapshots/".
+            offline (bool, optional): Whether to only use the stored snapshot, without any API requests. Defaults to False.
+        """
+        self.sheetname = sheetname
+        self.offline = offline
+        filename = re.sub(r"[^A-Za-z0-9]+", "_", sheetname).strip("_")
+        self.filename = Path(path).resolve() / f"{filename}.json"
+
+    def read(self) -> dict:
+        """Read the stored snapshot.
+
+        Returns:
+            dict: The snapshot, or an empty one if there is none.
+        """
+        try:
+            with open(self.filename, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"modifiedTime": None, "grades": {}}
+
+    def write(self, snapshot: dict):
+        """Store a snapshot.
+
+        Args:
+            snapshot (dict): The snapshot to store.
+        """
+        with atomic_write(self.filename, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+
+    def load(
+        self,
+        grades: list[str],
+        client_factory: Optional[Callable[[], gspread.Client]] = None,
+    ) -> dict[str, list[list[str]]]:
+        """Get the contents of the worksheets for some grades, fetching them only if
+        the document has changed or they aren't in the snapshot yet.
+
+        Args:
+            grades (list[str]): The grade levels of the worksheets to get.
+            client_factory (Optional[Callable[[], gspread.Client]], optional): Makes an authorized gspread client, if one is needed. Defaults to None, which uses the client shared by the whole run.
+
+        Raises:
+            LookupError: In offline mode, if a grade isn't in the snapshot.
+
+        Returns:
+            dict[str, list[list[str]]]: The contents of each grade's worksheet in list form (two-dimensional).
+        """
+        snapshot = self.read()
+        missing = [grade for grade in grades if grade not in snapshot["grades"]]
+        if self.offline:
+            if missing:
+                raise LookupError(
+                    f"Grades {', '.join(missing)} are not in the snapshot {self.filename}."
+                )
+            print("Using the stored snapshot (offline).")
+            return {grade: snapshot["grades"][grade] for grade in grades}
+
+        if client_factory is None:
+            client_factory = googleapi.get_client
+        client = client_factory()
+        spreadsheet = client.open(self.sheetname)
+        modified = client.request(
+            "get",
+            f"{gspread.urls.DRIVE_FILES_API_V3_URL}/{spreadsheet.id}",
+            params={"fields": "modifiedTime"},
+        ).json()["modifiedTime"]
+        if modified != snapshot["modifiedTime"]:
+            # everything stored is out of date
+            snapshot = {"modifiedTime": modified, "grades": {}}
+            missing = list(grades)
+        if missing:
+            print(f"Fetching grades {', '.join(missing)} ...")
+            response = spreadsheet.values_batch_get(
+                ranges=[f"grade_{grade}" for grade in missing]
+            )
+            for grade, valuerange in zip(missing, response["valueRanges"]):
+                # pad the rows like get_all_values() does
+                snapshot["grades"][grade] = gspread.utils.fill_gaps(
+                    valuerange.get("values", [])
+                )
+            self.write(snapshot)
+        else:
+            print("The sheet hasn't changed; using the stored snapshot.")
+        return {grade: snapshot["grades"][grade] for grade in grades}
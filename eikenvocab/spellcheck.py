@@ -0,0 +1,135 @@
+# standard library imports
+from pathlib import Path
+import json
+from typing import Iterable, Optional
+
+# local imports
+from atomicfile import atomic_write
+from lazyimport import lazy_import
+
+# third party imports, loaded on first use
+enchant = lazy_import("enchant")
+
+
+# English variants whose dictionaries a word may be found in
+DEFAULT_VARIANTS = ("en", "en_US", "en_GB", "en_CA", "en_AU")
+
+
+class SpellcheckIndex:
+    """Check words against several spellcheck dictionaries, remembering the verdict
+    for each distinct word. Verdicts can be saved to a lexicon file, so later runs
+    don't need to ask enchant about words they have already seen.
+    """
+
+    def __init__(
+        self,
+        variants: Iterable[str] = DEFAULT_VARIANTS,
+        lexicon_path: Optional[str] = Path(__file__).parent.parent.resolve()
+        / "cache/lexicon.json",
+    ):
+        """
+        Args:
+            variants (Iterable[str], optional): The enchant dictionaries to check against. Defaults to DEFAULT_VARIANTS.
+            lexicon_path (Optional[str], optional): The file where verdicts are saved between runs, or None to keep them in memory only. Defaults to Path(__file__).parent.parent.resolve()/"cache/lexicon.json".
+        """
+        self.variants = list(variants)
+        self.lexicon_path = Path(lexicon_path) if lexicon_path else None
+        self.verdicts = {}
+        self.lookups = 0
+        self.memo_hits = 0
+        self._dictionaries = None
+        self._dirty = False
+        self.load()
+
+    @property
+    def dictionaries(self) -> list:
+        # only pay for loading the dictionaries if a word isn't already known
+        if self._dictionaries is None:
+            self._dictionaries = [enchant.Dict(variant) for variant in self.variants]
+        return self._dictionaries
+
+    def load(self):
+        """Load saved verdicts from the lexicon file, if it was made with the same variants."""
+        if self.lexicon_path is None or not self.lexicon_path.exists():
+            return
+        with open(self.lexicon_path, encoding="utf-8") as f:
+            lexicon = json.load(f)
+        if lexicon.get("variants") == self.variants:
+            self.verdicts.update(lexicon["words"])
+
+    def save(self):
+        """Save the verdicts to the lexicon file, if any new words were checked."""
+        if self.lexicon_path is None or not self._dirty:
+            return
+        lexicon = {"variants": self.variants, "words": self.verdicts}
+        with atomic_write(self.lexicon_path, "w", encoding="utf-8") as f:
+            json.dump(lexicon, f, ensure_ascii=False)
+        self._dirty = False
+
+    def check(self, word: str) -> bool:
+        """Check whether a word is in any of the dictionaries.
+
+        Args:
+            word (str): The word to check.
+
+        Returns:
+            bool: True if any of the dictionaries contains the word.
+        """
+        try:
+            verdict = self.verdicts[word]
+            self.memo_hits += 1
+            return verdict
+        except KeyError:
+            pass
+        self.lookups += 1
+        verdict = any(dictionary.check(word) for dictionary in self.dictionaries)
+        self.verdicts[word] = verdict
+        self._dirty = True
+        return verdict
+
+    def filter(self, words: Iterable[str]) -> list[str]:
+        """Keep only the words which are in any of the dictionaries.
+
+        Args:
+            words (Iterable[str]): The words to check.
+
+        Returns:
+            list[str]: The words that passed, in their original order.
+        """
+        return [word for word in words if self.check(word)]
+
+    def report(self) -> str:
+        """Summarize how often enchant was needed.
+
+        Returns:
+            str: A one-line summary of the lookups and memoized verdicts.
+        """
+        return (
+            f"Spellcheck: {self.lookups} dictionary lookups, "
+            f"{self.memo_hits} remembered verdicts."
+        )
+
+
+_index = None
+
+
+def get_index() -> SpellcheckIndex:
+    """Get the spellcheck index shared by the whole run, making it on first use.
+
+    Returns:
+        SpellcheckIndex: The shared index.
+    """
+    global _index
+    if _index is None:
+        _index = SpellcheckIndex()
+    return _index
+
+
+def set_index(index: SpellcheckIndex):
+    """Replace the spellcheck index shared by the whole run, e.g. to use other variants.
+
+    Args:
+        index (SpellcheckIndex): The index to share.
+    """
+    global _index
+    _index = index
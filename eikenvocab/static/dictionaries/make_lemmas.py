@@ -0,0 +1,121 @@
+"""Make lemmas.tsv.gz from the lemma lookup table of LemmInflect, keeping only the
+words whose base form doesn't depend on how they are used.
+
+    pip install lemminflect
+    python eikenvocab/static/dictionaries/make_lemmas.py
+
+Each word is checked against a few which must, or mustn't, be in the list, and the
+list isn't written if any of them is wrong.
+"""
+
+# standard library imports
+from pathlib import Path
+from collections import defaultdict
+import gzip
+import re
+
+# third party imports
+import typer
+
+OUTPUT = Path(__file__).parent.resolve() / "lemmas.tsv.gz"
+# The forms of words in the list, and the base forms they must have
+EXPECTED = {
+    "went": "go",
+    "goes": "go",
+    "children": "child",
+    "studies": "study",
+    "bought": "buy",
+    "happier": "happy",
+    "was": "be",
+}
+# Words which are their own noun or adjective, so they must be left alone, e.g.
+#  "interesting" isn't "interest" and "leaves" may be the plural of "leaf"
+SEPARATE_WORDS = [
+    "interesting",
+    "boring",
+    "building",
+    "meeting",
+    "feeling",
+    "leaves",
+    "evening",
+    "left",
+    "saw",
+    "glasses",
+    "goods",
+]
+WORD_REGEX = re.compile(r"[a-z']+$")
+
+
+def default_source() -> Path:
+    import lemminflect
+
+    return Path(lemminflect.__file__).parent / "resources/lemma_lu.csv.gz"
+
+
+def read_lookup(filename: Path) -> dict[str, list[tuple[str, list[str]]]]:
+    """Read LemmInflect's lookup table, which has a line for each word and part of
+    speech with its possible base forms, e.g. "leaves,noun,leave/leaf".
+    """
+    entries = defaultdict(list)
+    with gzip.open(filename, "rt", encoding="utf-8") as f:
+        for line in f:
+            form, category, spellings = line.strip().split(",")
+            entries[form].append((category, spellings.split("/")))
+    return entries
+
+
+def base_form(form: str, entries: list[tuple[str, list[str]]]):
+    # a word which is its own base form as any part of speech, e.g. the noun
+    #  "building" or the adjective "interesting", or which is also a noun or
+    #  adjective with another base form, e.g. "leaves", is kept as it is
+    for category, spellings in entries:
+        if form in spellings:
+            return None
+        if category in ("noun", "adj") and len(spellings) > 1 and len(entries) > 1:
+            return None
+    lemmas = {spellings[0] for _, spellings in entries}
+    if len(lemmas) != 1:
+        # "'s" is "be" or "have", but as an auxiliary verb, e.g. "is", it's "be"
+        lemmas = {spellings[0] for category, spellings in entries if category == "aux"}
+        if len(lemmas) != 1:
+            return None
+    lemma = lemmas.pop()
+    return lemma if WORD_REGEX.match(lemma) else None
+
+
+def check(pairs: dict[str, str]):
+    wrong = [
+        f"{form} -> {pairs.get(form)}, not {lemma}"
+        for form, lemma in EXPECTED.items()
+        if pairs.get(form) != lemma
+    ]
+    wrong += [f"{form} -> {pairs[form]}" for form in SEPARATE_WORDS if form in pairs]
+    if wrong:
+        raise ValueError(f"The lemma list is wrong: {'; '.join(wrong)}.")
+
+
+def main(
+    source: str = typer.Option(
+        None,
+        "--source",
+        help="LemmInflect's lemma_lu.csv.gz.",
+        show_default="the installed lemminflect's",
+    ),
+    output: str = typer.Option(OUTPUT, "--output", "-o", help="The list to write."),
+):
+    lookup = read_lookup(Path(source) if source else default_source())
+    pairs = {}
+    for form, entries in lookup.items():
+        if WORD_REGEX.match(form):
+            lemma = base_form(form, entries)
+            if lemma is not None:
+                pairs[form] = lemma
+    check(pairs)
+    # mtime=0 makes the same list give the same file, so it only changes when it does
+    with gzip.GzipFile(output, "wb", mtime=0) as f:
+        f.write("".join(f"{form}\t{pairs[form]}\n" for form in sorted(pairs)).encode())
+    print(f"Wrote {len(pairs)} words to {output}.")
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -1,39 +1,153 @@
-import requests
+# standard library imports
+from __future__ import annotations
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import json
+import time
+from typing import Iterable, Iterator, Optional
 
+# local imports
+from atomicfile import atomic_write
+import profiling
+from lazyimport import lazy_import
 
-def download_file(url: str, path: str):
+# third party imports, loaded on first use
+requests = lazy_import("requests")
+
+BASE_URL = "https://www.eiken.or.jp/eiken/exam/"
+DEFAULT_YEARS = [2021, 2020]
+CHUNK_SIZE = 64 * 1024
+
+
+def make_session(workers: int = 8) -> requests.Session:
+    """Make an HTTP session whose connections are kept alive and shared between downloads.
+
+    Args:
+        workers (int, optional): The number of downloads that may run at once. Defaults to 8.
+
+    Returns:
+        requests.Session: The session.
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=workers, pool_maxsize=workers
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def metadata_path(path: str) -> Path:
+    """Get the path of the file which remembers the validators (ETag, Last-Modified) of a download.
+
+    Args:
+        path (str): The local path of the downloaded file.
+
+    Returns:
+        Path: The path of the metadata file, next to the download.
+    """
+    path = Path(path)
+    return path.parent / f".{path.name}.json"
+
+
+def download_file(
+    url: str,
+    path: str,
+    session: Optional[requests.Session] = None,
+    recheck: bool = False,
+) -> bool:
     """Download a file from the web.
 
     Args:
         url (str): The URL of the file to download.
         path (str): The local path where the file will be saved.
+        session (Optional[requests.Session], optional): The session to download with. Defaults to None, which makes a new one.
+        recheck (bool, optional): Whether to ask the server if a file that was already downloaded has changed. Defaults to False, which skips it.
+
+    Returns:
+        bool: True if the file was (re-)downloaded.
     """
+    path = Path(path)
+    if session is None:
+        session = make_session(workers=1)
+    headers = {}
+    if path.exists():
+        if not recheck:
+            print(f"Already downloaded {path.name}.")
+            return False
+        try:
+            with open(metadata_path(path), encoding="utf-8") as f:
+                metadata = json.load(f)
+        except FileNotFoundError:
+            metadata = {}
+        if metadata.get("ETag"):
+            headers["If-None-Match"] = metadata["ETag"]
+        if metadata.get("Last-Modified"):
+            headers["If-Modified-Since"] = metadata["Last-Modified"]
+    profiler = profiling.get_profiler()
+    start = time.perf_counter()
+    responded = False
     try:
-        with requests.get(url) as response:
+        with session.get(url, headers=headers, stream=True, timeout=60) as response:
+            profiler.call("eiken.or.jp", start)
+            responded = True
+            if response.status_code == requests.codes.not_modified:
+                print(f"Unchanged {path.name}.")
+                return False
             try:
                 response.raise_for_status()
-                print("Downloading file ...")
-                with open(path, "wb") as f:
-                    print("Writing file ...")
-                    f.write(response.content)
-                print("Done.")
             except requests.exceptions.HTTPError:
-                print("No test")
+                print(f"No test {path.name}")
+                return False
+            print(f"Downloading {path.name} ...")
+            # a failed download never leaves a partial PDF
+            with atomic_write(path, suffix=".part") as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    f.write(chunk)
+                    profiler.add_bytes("downloaded", len(chunk))
+            metadata = {
+                key: response.headers[key]
+                for key in ("ETag", "Last-Modified")
+                if key in response.headers
+            }
+            with open(metadata_path(path), "w", encoding="utf-8") as f:
+                json.dump(metadata, f)
+            print(f"Done {path.name}.")
+            return True
     except requests.exceptions.ConnectionError:
-        print("Cannot connect.")
+        if not responded:
+            profiler.call("eiken.or.jp", start, failed=True)
+        print(f"Cannot connect for {path.name}.")
+        return False
+    except requests.exceptions.RequestException as error:
+        # e.g. a read timeout or a broken transfer: only this file fails
+        if not responded:
+            profiler.call("eiken.or.jp", start, failed=True)
+        print(f"Failed to download {path.name}: {error}")
+        return False
 
 
-def scrape_eiken_tests(grades: list[str], path: str):
-    """Scrape the Eiken site to download test PDFs.
+def eiken_test_urls(
+    grades: list[str],
+    path: str,
+    years: Optional[Iterable[int]] = None,
+    base_url: str = BASE_URL,
+) -> Iterator[tuple[str, Path]]:
+    """List the URLs of the test PDFs on the Eiken site, and where to save each one.
 
     Args:
         grades (list[str]): A list of the grades to include.
         path (str): The local path where the files will be saved.
+        years (Optional[Iterable[int]], optional): The years of tests to include. Defaults to None, which uses DEFAULT_YEARS.
+        base_url (str, optional): The URL the test paths are relative to. Defaults to BASE_URL.
+
+    Yields:
+        Iterator[tuple[str, Path]]: The URL and local path of each file.
     """
     base_path = Path(path).resolve()
-    base_url = "https://www.eiken.or.jp/eiken/exam/"
-    years = ["2021", "2020"]
+    if years is None:
+        years = DEFAULT_YEARS
+    years = list(years)
     # Every year has three test sessions (Summer, Fall, Winter)
     sessions = ["1", "2", "3"]
     for grade in grades:
@@ -50,7 +164,60 @@ def scrape_eiken_tests(grades: list[str], path: str):
                 ]
                 for filename in filenames:
                     url = f"{base_url}/grade_{grade}/pdf/{year}0{session}/{filename}"
-                    download_file(url=url, path=download_path / filename)
+                    yield url, download_path / filename
+
+
+def download_files(
+    downloads: Iterable[tuple[str, Path]], workers: int = 8, recheck: bool = False
+) -> Iterator[Path]:
+    """Download several files at once over a shared session.
+
+    Args:
+        downloads (Iterable[tuple[str, Path]]): The URL and local path of each file.
+        workers (int, optional): The maximum number of downloads to run at once. Defaults to 8.
+        recheck (bool, optional): Whether to ask the server if files that were already downloaded have changed. Defaults to False.
+
+    Yields:
+        Iterator[Path]: The local path of each file that is on disk, as soon as it is ready.
+    """
+    session = make_session(workers=workers)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(download_file, url, path, session, recheck): path
+            for url, path in downloads
+        }
+        for future in as_completed(futures):
+            future.result()
+            path = futures[future]
+            if path.exists():
+                yield path
+
+
+def scrape_eiken_tests(
+    grades: list[str],
+    path: str,
+    years: Optional[Iterable[int]] = None,
+    workers: int = 8,
+    recheck: bool = False,
+    base_url: str = BASE_URL,
+) -> list[Path]:
+    """Scrape the Eiken site to download test PDFs.
+
+    Args:
+        grades (list[str]): A list of the grades to include.
+        path (str): The local path where the files will be saved.
+        years (Optional[Iterable[int]], optional): The years of tests to include. Defaults to None, which uses DEFAULT_YEARS.
+        workers (int, optional): The maximum number of downloads to run at once. Defaults to 8.
+        recheck (bool, optional): Whether to ask the server if files that were already downloaded have changed. Defaults to False.
+        base_url (str, optional): The URL the test paths are relative to, e.g. a local server for testing. Defaults to BASE_URL.
+
+    Returns:
+        list[Path]: The local paths of the test PDFs that are on disk.
+    """
+    downloads = eiken_test_urls(
+        grades=grades, path=path, years=years, base_url=base_url
+    )
+    return list(download_files(downloads, workers=workers, recheck=recheck))
 
 
 def main():
@@ -58,7 +225,7 @@ def main():
     grades = ["5", "4", "3", "p2", "2", "p1", "1"]
     # grades = ["1"]
     base_path = Path(__file__).parent.parent.resolve() / "data"
-    scrape_eiken_tests(grades=grades, base_path=base_path)
+    scrape_eiken_tests(grades=grades, path=base_path)
 
 
 if __name__ == "__main__":
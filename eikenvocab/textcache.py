@@ -0,0 +1,85 @@
+# standard library imports
+from pathlib import Path
+import hashlib
+import json
+from typing import Optional
+
+# local imports
+from filecache import FileCache
+
+
+class TextCache(FileCache):
+    """An on-disk cache of the text extracted from PDF files.
+
+    Entries are keyed by a hash of the PDF's contents plus the extraction
+    options, so a file that is renamed or re-downloaded unchanged is still
+    a hit, and a file whose contents change is a miss.
+    """
+
+    suffix = ".txt"
+
+    def __init__(
+        self,
+        path: str = Path(__file__).parent.parent.resolve() / "cache/text/",
+        max_bytes: int = 256 * 1024 * 1024,
+        max_age_days: Optional[float] = 180,
+    ):
+        """
+        Args:
+            path (str, optional): The directory where cached text is stored. Defaults to Path(__file__).parent.parent.resolve()/"cache/text/".
+            max_bytes (int, optional): The total size the cache is trimmed to on eviction. Defaults to 256 MiB.
+            max_age_days (Optional[float], optional): Entries not used for this many days are evicted. Defaults to 180.
+        """
+        super().__init__(path, max_bytes=max_bytes, max_age_days=max_age_days)
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, file: str, **options) -> str:
+        """Make a cache key for a PDF file and its extraction options.
+
+        Args:
+            file (str): The PDF file.
+            **options: The extraction options, e.g. drop_first_and_last_pages.
+
+        Returns:
+            str: A hex digest identifying the file contents and options.
+        """
+        digest = hashlib.sha256()
+        with open(file, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        digest.update(json.dumps(options, sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Get the cached text for a key.
+
+        Args:
+            key (str): A key from TextCache.key().
+
+        Returns:
+            Optional[str]: The cached text, or None if there is no entry.
+        """
+        data = super().get(key)
+        if data is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data.decode("utf-8")
+
+    def put(self, key: str, text: str):
+        """Store the text for a key.
+
+        Args:
+            key (str): A key from TextCache.key().
+            text (str): The extracted text.
+        """
+        super().put(key, text.encode("utf-8"))
+
+    def report(self) -> str:
+        """Summarize how often the cache was used.
+
+        Returns:
+            str: A one-line summary of hits and misses.
+        """
+        return f"PDF text cache: {self.hits} hits, {self.misses} misses."
@@ -0,0 +1,246 @@
+# standard library imports
+from __future__ import annotations
+from collections import Counter
+from typing import Callable, Iterable, Optional
+
+# local imports
+from lazyimport import lazy_import
+
+# third party imports, loaded on first use
+np = lazy_import("numpy")
+
+
+# Every grade, from easiest to hardest
+GRADES = ["5", "4", "3", "p2", "2", "p1", "1"]
+# The ways Vocabulary.rank() can order the words of a grade
+RANKINGS = ["frequency", "documents", "tfidf", "new"]
+
+
+class Vocabulary:
+    """Word counts for every document (test PDF) of every grade, as a sparse
+    document-by-word matrix, for ranking words with vectorized operations.
+
+    Words are interned to integer ids, in order of first occurrence, and the
+    matrix is kept in coordinate form: parallel arrays of document id, word id
+    and count, one entry per distinct word in each document.
+    """
+
+    def __init__(self, grades: Iterable[str]):
+        """
+        Args:
+            grades (Iterable[str]): The grades, from easiest to hardest, e.g. ["5", "4", "3"].
+        """
+        self.grades = list(grades)
+        self.words = []
+        self.word_ids = {}
+        self.documents = []
+        self._document_grades = []
+        self._entries = ([], [], [])
+        self._matrix = None
+        self.keep = None
+        self._forms = None
+
+    def add_document(self, grade: str, name: str, counts: Counter):
+        """Add the word counts of one document.
+
+        Args:
+            grade (str): The grade of the document.
+            name (str): A name for the document, e.g. its filename.
+            counts (Counter): The frequency of each word in the document.
+        """
+        document_id = len(self.documents)
+        self.documents.append(name)
+        self._document_grades.append(self.grades.index(grade))
+        documents, words, frequencies = self._entries
+        for word, count in counts.items():
+            word_id = self.word_ids.get(word)
+            if word_id is None:
+                word_id = self.word_ids[word] = len(self.words)
+                self.words.append(word)
+            documents.append(document_id)
+            words.append(word_id)
+            frequencies.append(count)
+        self._matrix = None
+
+    @property
+    def matrix(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # build the arrays once all the documents have been added
+        if self._matrix is None:
+            documents, words, frequencies = self._entries
+            self._matrix = (
+                np.array(documents, dtype=np.int32),
+                np.array(words, dtype=np.int32),
+                np.array(frequencies, dtype=np.int64),
+            )
+        return self._matrix
+
+    def filter(self, clean: Callable[[list[str]], list[str]]):
+        """Leave out words from every ranking, checking each distinct word only once.
+
+        Args:
+            clean (Callable[[list[str]], list[str]]): Returns the words worth keeping, e.g. wordlists.clean_wordlist.
+        """
+        keep = np.zeros(len(self.words), dtype=bool)
+        kept = clean(list(self.words))
+        keep[[self.word_ids[word] for word in kept]] = True
+        self.keep = keep
+
+    def lemmatize(self, lemma: Callable[[str], str]):
+        """Count the forms of each word as one word, e.g. "goes" and "went" as "go",
+        leaving out the words filter() left out. Call it after adding every document.
+        The frequency of each form is kept, for forms().
+
+        Args:
+            lemma (Callable[[str], str]): Gives the base form of a word, e.g. lemmas.get_index().lemma.
+        """
+        documents, words, frequencies = self.matrix
+        form_words = self.words
+        form_frequency = {grade: self.frequency(grade) for grade in self.grades}
+        kept = np.ones(len(form_words), dtype=bool) if self.keep is None else self.keep
+        base_ids = np.full(len(form_words), -1, dtype=np.int32)
+        self.words = []
+        self.word_ids = {}
+        form_ids = []
+        # base forms get ids in order of the first occurrence of any of their forms
+        for word_id in np.flatnonzero(kept):
+            base = lemma(form_words[word_id])
+            base_id = self.word_ids.get(base)
+            if base_id is None:
+                base_id = self.word_ids[base] = len(self.words)
+                self.words.append(base)
+                form_ids.append([])
+            base_ids[word_id] = base_id
+            form_ids[base_id].append(word_id)
+        # add up the forms of each word within each document
+        words = base_ids[words]
+        mask = words >= 0
+        keys = documents[mask].astype(np.int64) * len(self.words) + words[mask]
+        keys, inverse = np.unique(keys, return_inverse=True)
+        self._entries = (
+            keys // len(self.words),
+            keys % len(self.words),
+            np.bincount(inverse, weights=frequencies[mask]),
+        )
+        self._matrix = None
+        self.keep = None
+        self._forms = (form_words, form_frequency, form_ids)
+
+    def forms(self, grade: str, word: str) -> Counter:
+        """Get the forms a word was found in, after lemmatize().
+
+        Args:
+            grade (str): Only count documents of this grade.
+            word (str): The base form.
+
+        Returns:
+            Counter: The frequency of each form of the word in the grade.
+        """
+        if self._forms is None:
+            return Counter({word: int(self.frequency(grade)[self.word_ids[word]])})
+        form_words, form_frequency, form_ids = self._forms
+        frequency = form_frequency[grade]
+        return Counter(
+            {
+                form_words[form_id]: int(frequency[form_id])
+                for form_id in form_ids[self.word_ids[word]]
+                if frequency[form_id] > 0
+            }
+        )
+
+    def _grade_mask(self, grade: Optional[str]) -> np.ndarray:
+        documents, _, _ = self.matrix
+        if grade is None:
+            return np.ones(len(documents), dtype=bool)
+        grades = np.array(self._document_grades, dtype=np.int32)
+        return grades[documents] == self.grades.index(grade)
+
+    def frequency(self, grade: Optional[str] = None) -> np.ndarray:
+        """Count each word's occurrences.
+
+        Args:
+            grade (Optional[str], optional): Only count documents of this grade. Defaults to None, which counts all of them.
+
+        Returns:
+            np.ndarray: The total frequency of each word, by word id.
+        """
+        _, words, frequencies = self.matrix
+        mask = self._grade_mask(grade)
+        return np.bincount(
+            words[mask], weights=frequencies[mask], minlength=len(self.words)
+        ).astype(np.int64)
+
+    def document_frequency(self, grade: Optional[str] = None) -> np.ndarray:
+        """Count the documents each word appears in.
+
+        Args:
+            grade (Optional[str], optional): Only count documents of this grade. Defaults to None, which counts all of them.
+
+        Returns:
+            np.ndarray: The number of documents containing each word, by word id.
+        """
+        _, words, _ = self.matrix
+        return np.bincount(words[self._grade_mask(grade)], minlength=len(self.words))
+
+    def tfidf(self, grade: str) -> np.ndarray:
+        """Score each word by its frequency in a grade, weighted by how few
+        documents of any grade it appears in, so words particular to the grade
+        rank above ones common to every test.
+
+        Args:
+            grade (str): The grade to score for.
+
+        Returns:
+            np.ndarray: The TF-IDF score of each word, by word id.
+        """
+        idf = np.log((1 + len(self.documents)) / (1 + self.document_frequency())) + 1
+        return self.frequency(grade) * idf
+
+    def first_grade(self) -> np.ndarray:
+        """Find the easiest grade each word appears in.
+
+        Returns:
+            np.ndarray: The index into grades of each word's first grade, by word id.
+        """
+        documents, words, _ = self.matrix
+        grades = np.array(self._document_grades, dtype=np.int32)
+        first = np.full(len(self.words), len(self.grades), dtype=np.int32)
+        np.minimum.at(first, words, grades[documents])
+        return first
+
+    def rank(
+        self, grade: str, method: str = "frequency", limit: Optional[int] = None
+    ) -> list[tuple]:
+        """Rank the words of a grade.
+
+        Args:
+            grade (str): The grade to rank words for.
+            method (str, optional): One of RANKINGS: "frequency" (occurrences in the grade), "documents" (number of the grade's documents a word is in), "tfidf" or "new" (by frequency, leaving out words that appear in an easier grade). Defaults to "frequency".
+            limit (Optional[int], optional): The maximum number of words. Defaults to None.
+
+        Returns:
+            list[tuple]: Tuples of each word and its frequency within the grade, best first, like get_most_frequent_words().
+        """
+        frequency = self.frequency(grade)
+        if method == "frequency":
+            score = frequency
+        elif method == "documents":
+            score = self.document_frequency(grade)
+        elif method == "tfidf":
+            score = self.tfidf(grade)
+        elif method == "new":
+            score = np.where(
+                self.first_grade() == self.grades.index(grade), frequency, 0
+            )
+        else:
+            raise ValueError(f"Unknown ranking '{method}'; use one of {RANKINGS}.")
+        candidates = frequency > 0
+        if self.keep is not None:
+            candidates &= self.keep
+        if method == "new":
+            candidates &= score > 0
+        word_ids = np.flatnonzero(candidates)
+        # ties stay in order of first occurrence, as with Counter.most_common()
+        order = word_ids[np.argsort(-score[word_ids], kind="stable")]
+        if limit is not None:
+            order = order[:limit]
+        return [(self.words[word_id], int(frequency[word_id])) for word_id in order]
@@ -1,49 +1,158 @@
 # standard library imports
+from __future__ import annotations
 from pathlib import Path
 import os
 import re
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Optional
+import threading
+from typing import Iterable, Iterator, Optional, Union
 
 # third party imports
-import fitz  # pyMuPDF - get text from PDFs
-import enchant
-import gspread
-from gspread.models import Cell
-from oauth2client.service_account import ServiceAccountCredentials
-from google.cloud import translate_v2 as translate
-import requests
-from bs4 import BeautifulSoup
-import pykakasi
 import jaconv
 
+# local imports
+from textcache import TextCache
+import spellcheck
+from enrichcache import EnrichmentCache
+from ratelimit import RemoteService
+import pronunciation
+import lemmas
+from vocabulary import Vocabulary, GRADES
+from journal import Journal
+from wordtable import WordTable
+from lazyimport import lazy_import
+
+# third party imports, loaded on first use
+fitz = lazy_import("fitz")  # pyMuPDF - get text from PDFs
+gspread = lazy_import("gspread")
+translate = lazy_import("google.cloud.translate_v2")
+google_exceptions = lazy_import("google.api_core.exceptions")
+requests = lazy_import("requests")
+bs4 = lazy_import("bs4")
+pykakasi = lazy_import("pykakasi")
+googleapi = lazy_import("googleapi")
+
+
+def pdf_to_string(file: Path, drop_first_and_last_pages: bool = True) -> str:
+    """Extract the text layer of a single PDF file.
+
+    Args:
+        file (Path): Path to the source PDF file.
+        drop_first_and_last_pages (bool, optional): Whether to remove the first and last pages, which often don't have any content. Defaults to True.
+
+    Returns:
+        str: A string containing all of the text from the PDF file.
+    """
+    pages = fitz.open(file)
+    if drop_first_and_last_pages:
+        selection = list(range(1, pages.pageCount - 1))
+        pages.select(selection)
+    # join once at the end, rather than growing a string page by page
+    return "".join(page.get_text() for page in pages)
+
+
+def iter_pdf_texts(
+    input_path: str = Path(__file__).parent.parent.resolve() / "data/",
+    drop_first_and_last_pages: bool = True,
+    jobs: Optional[int] = None,
+    cache: Optional[TextCache] = None,
+) -> Iterator[tuple[Path, str]]:
+    """Extract the text layer of each PDF file in a directory, one file at a time.
+
+    Args:
+        input_path (str, optional): Path to the source PDF files. Defaults to Path(__file__).parent.parent.resolve()/"data/".
+        drop_first_and_last_pages (bool, optional): Whether to remove the first and last pages, which often don't have any content. Defaults to True.
+        jobs (Optional[int], optional): The number of worker processes to extract with. Defaults to None, which extracts serially in this process.
+        cache (Optional[TextCache], optional): A cache of previously extracted text. Only files missing from it are parsed. Defaults to None.
+
+    Yields:
+        Iterator[tuple[Path, str]]: The path of each PDF file and its text, in the same order as the serial path.
+    """
+    filelist = list(Path(input_path).glob("*.pdf"))
+    keys = {}
+    cached = {}
+    if cache is not None:
+        for file in filelist:
+            keys[file] = cache.key(
+                file, drop_first_and_last_pages=drop_first_and_last_pages
+            )
+            text = cache.get(keys[file])
+            if text is not None:
+                cached[file] = text
+    misses = [file for file in filelist if file not in cached]
+
+    def store(file: Path, text: str) -> str:
+        if cache is not None:
+            cache.put(keys[file], text)
+        return text
+
+    if not jobs or jobs < 2 or len(misses) < 2:
+        for file in filelist:
+            if file in cached:
+                yield file, cached[file]
+            else:
+                yield file, store(file, pdf_to_string(file, drop_first_and_last_pages))
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            file: executor.submit(pdf_to_string, file, drop_first_and_last_pages)
+            for file in misses
+        }
+        # hand results back in glob order, as soon as each one is ready
+        for file in filelist:
+            if file in cached:
+                yield file, cached[file]
+            else:
+                yield file, store(file, futures[file].result())
+
 
 def pdfs_to_string(
     input_path: str = Path(__file__).parent.parent.resolve() / "data/",
     drop_first_and_last_pages: bool = True,
+    jobs: Optional[int] = None,
+    cache: Optional[TextCache] = None,
 ) -> str:
     """Extract the text layer of a PDF file.
 
     Args:
         input_path (str, optional): Path to the source PDF files. Defaults to Path(__file__).parent.parent.resolve()/"data/".
         drop_first_and_last_pages (bool, optional): Whether to remove the first and last pages, which often don't have any content. Defaults to True.
+        jobs (Optional[int], optional): The number of worker processes to extract with. Defaults to None (serial).
+        cache (Optional[TextCache], optional): A cache of previously extracted text. Defaults to None.
 
     Returns:
         str: A string containing all of the text from the PDF files.
     """
-    # print("Starting PDF reading and text layer extraction ...")
-    output_string = ""
-    filelist = input_path.glob("*.pdf")
-    for file in filelist:
-        pages = fitz.open(file)
-        if drop_first_and_last_pages:
-            selection = list(range(1, pages.pageCount - 1))
-            pages.select(selection)
-        for page in pages:
-            output_string += page.get_text()
-    # print("Finished PDF reading and text layer extraction")
-    return output_string
+    return "".join(
+        text
+        for _, text in iter_pdf_texts(
+            input_path=input_path,
+            drop_first_and_last_pages=drop_first_and_last_pages,
+            jobs=jobs,
+            cache=cache,
+        )
+    )
+
+
+# include any words made of letters and the apostrophe, for contractions
+WORD_REGEX = re.compile(r"[A-Za-z']+")
+
+
+def iter_words(string: str) -> Iterator[str]:
+    """Scrape the individual words from a string of text, one at a time.
+
+    Args:
+        string (str): The input string.
+
+    Yields:
+        Iterator[str]: Each word, in lowercase.
+    """
+    # the text results from the PDF often have a curly apostrophe, so replace it
+    string = string.replace("’", "'")
+    for match in WORD_REGEX.finditer(string.lower()):
+        yield match.group()
 
 
 def string_to_words(string: str) -> list[str]:
@@ -55,11 +164,22 @@ def string_to_words(string: str) -> list[str]:
     Returns:
         list[str]: A list of all words, in lowercase.
     """
-    # the text results from the PDF often have a curly apostrophe, so replace it
-    string = string.replace("’", "'")
-    # include any words made of letters and the apostrophe, for contractions
-    words = re.findall(r"[A-Za-z']+", string.lower())
-    return words
+    return list(iter_words(string))
+
+
+def count_words(strings: Iterable[str]) -> Counter:
+    """Count the words in a stream of text, without keeping a list of every occurrence.
+
+    Args:
+        strings (Iterable[str]): The input strings, e.g. the text of each PDF.
+
+    Returns:
+        Counter: The frequency of each word, in order of first occurrence.
+    """
+    counts = Counter()
+    for string in strings:
+        counts.update(iter_words(string))
+    return counts
 
 
 def remove_single_character_elements(words: list[str]) -> list[str]:
@@ -75,30 +195,21 @@ def remove_single_character_elements(words: list[str]) -> list[str]:
     return words
 
 
-def filter_by_spellcheck(words: list[str]) -> list[str]:
+def filter_by_spellcheck(
+    words: list[str], index: Optional[spellcheck.SpellcheckIndex] = None
+) -> list[str]:
     """Filter out any words from a list that can't be found in a spellcheck dictionary, leaving only real English words.
 
     Args:
         words (list[str]): A list of words to process.
+        index (Optional[spellcheck.SpellcheckIndex], optional): The spellcheck index to use. Defaults to None, which uses the index shared by the whole run.
 
     Returns:
         list[str]: A filtered list of words.
     """
-    en_dictionary = enchant.Dict("en")
-    us_dictionary = enchant.Dict("en_US")
-    gb_dictionary = enchant.Dict("en_GB")
-    ca_dictionary = enchant.Dict("en_CA")
-    au_dictionary = enchant.Dict("en_AU")
-    words = [
-        word
-        for word in words
-        if en_dictionary.check(word)
-        or us_dictionary.check(word)
-        or gb_dictionary.check(word)
-        or ca_dictionary.check(word)
-        or au_dictionary.check(word)
-    ]
-    return words
+    if index is None:
+        index = spellcheck.get_index()
+    return index.filter(words)
 
 
 def clean_wordlist(words: list[str]) -> list[str]:
@@ -115,59 +226,221 @@ def clean_wordlist(words: list[str]) -> list[str]:
     return words
 
 
+def clean_word_counts(counts: Counter) -> Counter:
+    """Clean up a table of word frequencies, to keep only real, useful English words.
+    The filters run once per distinct word, rather than once per occurrence.
+
+    Args:
+        counts (Counter): The frequency of each word.
+
+    Returns:
+        Counter: The filtered frequencies, in the same order as the input.
+    """
+    words = clean_wordlist(list(counts))
+    return Counter({word: counts[word] for word in words})
+
+
 def get_most_frequent_words(
-    words: list[str], limit: Optional[int] = None
+    words: Union[list[str], Counter], limit: Optional[int] = None
 ) -> list[tuple]:
     """Get a list of the most frequent words from a list of words.
 
     Args:
-        words (list[str]): A list of words to process
+        words (Union[list[str], Counter]): A list of words to process, or a Counter of their frequencies.
         limit (Optional[int], optional): The maximum number of words per list. Defaults to None.
 
     Returns:
         list[tuple]: A tuple containing a word and its frequency within the input list.
     """
-    words = Counter(words).most_common(limit)
-    return words
+    if not isinstance(words, Counter):
+        words = Counter(words)
+    return words.most_common(limit)
+
+
+def build_vocabulary(
+    grades: list[str],
+    datapath: str = Path(__file__).parent.parent.resolve() / "data",
+    jobs: Optional[int] = None,
+    cache: Optional[TextCache] = None,
+    lemmatize: bool = False,
+    easier_grades: bool = False,
+) -> Vocabulary:
+    """Count the words of every test PDF of some grades, keeping each PDF's counts
+    separate, and leave out words that aren't real, useful English words.
+
+    Args:
+        grades (list[str]): The grade levels to read, e.g. ["5", "4"].
+        datapath (str, optional): The path where the source PDFs are located, in a folder per grade. Defaults to Path(__file__).parent.parent.resolve()/"data".
+        jobs (Optional[int], optional): The number of worker processes to extract with. Defaults to None.
+        cache (Optional[TextCache], optional): A cache of previously extracted text. Defaults to None.
+        lemmatize (bool, optional): Whether to count the forms of each word as one word, e.g. "goes" and "went" as "go". Defaults to False.
+        easier_grades (bool, optional): Whether to also read every grade easier than the hardest of grades, only to compare with, e.g. for the "new" ranking. Defaults to False.
+
+    Returns:
+        Vocabulary: The word counts of every PDF, with the filters applied.
+    """
+    if easier_grades:
+        grades = GRADES[: max(GRADES.index(grade) for grade in grades) + 1]
+    # rank the grades from easiest to hardest, whatever order they were given in
+    vocabulary = Vocabulary(sorted(grades, key=GRADES.index))
+    for grade in vocabulary.grades:
+        print(f"Reading Grade {grade} ...")
+        documents = len(vocabulary.documents)
+        for file, text in iter_pdf_texts(
+            input_path=Path(datapath) / f"grade_{grade}", jobs=jobs, cache=cache
+        ):
+            vocabulary.add_document(grade, file.name, count_words([text]))
+        if len(vocabulary.documents) == documents:
+            print(f"Grade {grade} has no tests to compare with.")
+    vocabulary.filter(clean_wordlist)
+    if lemmatize:
+        vocabulary.lemmatize(lemmas.get_index().lemma)
+    return vocabulary
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Whether a failed call to a remote service is worth retrying.
+
+    Args:
+        error (Exception): The error the call raised.
+
+    Returns:
+        bool: True for timeouts, dropped connections, rate limiting and server errors.
+    """
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(
+        error, (google_exceptions.TooManyRequests, google_exceptions.ServerError)
+    )
 
 
-def english_to_katakana(word: str) -> str:
+# Each remote service gets its own limits, so a slow one doesn't starve the others
+SERVICES = {
+    "katakana": RemoteService(
+        "freeenglish.jp", max_concurrency=4, rate=4, is_transient=is_transient_error
+    ),
+    "translation": RemoteService(
+        "Google Translate", max_concurrency=2, rate=5, is_transient=is_transient_error
+    ),
+}
+_katakana_session = None
+
+
+def get_katakana_session() -> requests.Session:
+    """Get the HTTP session for freeenglish.jp, so connections are kept alive between words.
+
+    Returns:
+        requests.Session: The shared session.
+    """
+    global _katakana_session
+    if _katakana_session is None:
+        _katakana_session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=16)
+        _katakana_session.mount("https://", adapter)
+    return _katakana_session
+
+
+def english_to_katakana(word: str, session: Optional[requests.Session] = None) -> str:
     """Transliterate an English word into its katakana pronunciation equivalent.
 
     Args:
         word (str): An English word.
+        session (Optional[requests.Session], optional): The HTTP session to use. Defaults to None, which uses the shared session.
 
     Returns:
         str: A katakana transliteration of the English word.
     """
     url = "https://freeenglish.jp/convertp.php"
     mydata = {"englishtext": word, "prontype": "kana"}
+    if session is None:
+        session = get_katakana_session()
 
+    response = session.post(url, data=mydata, timeout=30)
+    # let server errors through, so they can be retried
+    response.raise_for_status()
     try:
-        response = requests.post(url, data=mydata)
-        soup = BeautifulSoup(response.content, "html.parser")
+        soup = bs4.BeautifulSoup(response.content, "html.parser")
         katakana_pronunciation = soup.select_one(".kana").text
     except AttributeError:
         katakana_pronunciation = "none"
     return katakana_pronunciation
 
 
-def english_to_japanese(word: str) -> str:
+# The Translate API accepts up to 128 strings per request
+TRANSLATE_CHUNK_SIZE = 128
+_translate_client = None
+
+
+def get_translate_client() -> translate.Client:
+    """Get the Google Translate client shared by the whole run, making it on first use.
+
+    Returns:
+        translate.Client: The client.
+    """
+    global _translate_client
+    if _translate_client is None:
+        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = str(
+            Path(__file__).parent.parent.resolve() / "translatecreds.json"
+        )
+        _translate_client = translate.Client()
+    return _translate_client
+
+
+def english_to_japanese(word: str, client: Optional[translate.Client] = None) -> str:
     """Translate an English word into Japanese.
 
     Args:
         word (str): An English word.
+        client (Optional[translate.Client], optional): The Translate client to use. Defaults to None, which uses the shared client.
 
     Returns:
         str: A Japanese translation of the English word.
     """
-    os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = str(
-        Path(__file__).parent.parent.resolve() / "translatecreds.json"
-    )
-    translate_client = translate.Client()
+    return english_to_japanese_batch([word], client=client)[0]
+
+
+def english_to_japanese_batch(
+    words: list[str],
+    client: Optional[translate.Client] = None,
+    chunk_size: int = TRANSLATE_CHUNK_SIZE,
+    service: Optional[RemoteService] = None,
+) -> list[str]:
+    """Translate a list of English words into Japanese, several words per request.
+
+    Args:
+        words (list[str]): A list of English words.
+        client (Optional[translate.Client], optional): The Translate client to use. Defaults to None, which uses the shared client.
+        chunk_size (int, optional): The maximum number of words per request. Defaults to TRANSLATE_CHUNK_SIZE.
+        service (Optional[RemoteService], optional): The limits and retries to make each request within. Defaults to None, which calls the client directly.
+
+    Returns:
+        list[str]: The Japanese translations, in the same order as the words.
+    """
+    if client is None:
+        client = get_translate_client()
     target_language = "ja"
-    translation = translate_client.translate(word, target_language=target_language)
-    return translation["translatedText"]
+    translations = []
+    for start in range(0, len(words), chunk_size):
+        chunk = words[start : start + chunk_size]
+        if service is None:
+            results = client.translate(chunk, target_language=target_language)
+        else:
+            results = service.call(
+                client.translate, chunk, target_language=target_language
+            )
+        # the API answers a list with a list in the same order
+        if len(results) != len(chunk):
+            raise ValueError(
+                f"Asked to translate {len(chunk)} words, but got {len(results)} translations."
+            )
+        translations.extend(result["translatedText"] for result in results)
+    return translations
+
+
+_kakasi = threading.local()
 
 
 def japanese_to_hiragana(word: str) -> str:
@@ -179,7 +452,10 @@ def japanese_to_hiragana(word: str) -> str:
     Returns:
         str: A string with all kanji transliterated into hiragana.
     """
-    kks = pykakasi.kakasi()
+    # setting up kakasi is slow, so keep one per thread
+    kks = getattr(_kakasi, "kks", None)
+    if kks is None:
+        kks = _kakasi.kks = pykakasi.kakasi()
     transliterationresult = kks.convert(word)
     # the above result is tokenized by what kakasi thinks are
     #  the words in the Japanese string, so we need to loop
@@ -190,23 +466,95 @@ def japanese_to_hiragana(word: str) -> str:
     return hiragana
 
 
-def make_wordlist(words: list[tuple]) -> list[dict]:
+def make_wordlist(
+    words: list[tuple],
+    cache: Optional[EnrichmentCache] = None,
+    translate_client: Optional[translate.Client] = None,
+    workers: int = 8,
+    web_fallback: bool = True,
+    offline_pronunciation: bool = False,
+    journal: Optional[Journal] = None,
+) -> WordTable:
     """Make a list of words along with their associated pronunciations, translations, etc.
 
     Args:
         words (list[tuple]): A list of tuples containing words and their frequencies in the source material.
+        cache (Optional[EnrichmentCache], optional): A cache of previous pronunciations and translations. Defaults to None, which looks up every word.
+        translate_client (Optional[translate.Client], optional): The Translate client to use. Defaults to None, which uses the shared client.
+        workers (int, optional): The number of words to look up at once. Each remote service also has its own limits, in SERVICES. Defaults to 8.
+        web_fallback (bool, optional): Whether to scrape the katakana for words which don't get it from the pronunciation dictionary. Defaults to True; otherwise, or if the scrape fails, they get "none".
+        offline_pronunciation (bool, optional): Whether to write the katakana of words in the pronunciation dictionary with its rules, instead of scraping it. Defaults to False.
+        journal (Optional[Journal], optional): A journal to record each word in as soon as it is done. Words it already has are not looked up again. Defaults to None.
+
+    Raises:
+        enrichcache.CacheMissError: If the cache is in offline mode and a word isn't in it.
 
     Returns:
-        list[dict]: A list of dictionaries containing the vocabulary words, their frequencies, pronunciations and translations.
+        WordTable: The vocabulary words, their frequencies, pronunciations and translations.
     """
-    wordlist = []
-    for wordcount in words:
+
+    def lookup(kind, word, function, keep=None):
+        if cache is None:
+            return function(word)
+        return cache.lookup(kind, word, function, keep=keep)
+
+    def translate_batch(words):
+        return english_to_japanese_batch(
+            words, client=translate_client, service=SERVICES["translation"]
+        )
+
+    def scrape_katakana(word):
+        try:
+            return SERVICES["katakana"].call(english_to_katakana, word)
+        except requests.exceptions.RequestException as error:
+            # an error that isn't worth retrying, or one that lasted through the
+            #  retries, leaves the word without katakana instead of failing the grade
+            print(f"Cannot get the katakana for {word}: {error}")
+            return "none"
+
+    wordlist = [None] * len(words)
+    if journal is not None:
+        for index, entry in journal.entries.items():
+            # a journal of another list of words, e.g. from other grades, is no use
+            if index < len(words) and entry.get("Word") == words[index][0]:
+                wordlist[index] = entry
+    pending = [index for index, entry in enumerate(wordlist) if entry is None]
+
+    # translate every word up front, in as few requests as possible
+    english_words = [words[index][0] for index in pending]
+    if cache is None:
+        translations = translate_batch(english_words)
+    else:
+        # save each request's translations as they come, in case a later one fails
+        translations = cache.lookup_many(
+            "translation",
+            english_words,
+            translate_batch,
+            chunk_size=TRANSLATE_CHUNK_SIZE,
+        )
+
+    def enrich(wordcount, translation_kanji):
         word, count = wordcount
-        pronunciation_kata = english_to_katakana(word)  # Katakana to Hiragana
+        pronunciation_kata = None
+        if offline_pronunciation:
+            pronunciation_kata = pronunciation.get_engine().convert(word)
+        if pronunciation_kata is None:
+            if web_fallback:
+                # don't remember failed scrapes, so they are tried again next time
+                pronunciation_kata = lookup(
+                    "katakana",
+                    word,
+                    scrape_katakana,
+                    keep=lambda kana: kana != "none",
+                )
+            else:
+                pronunciation_kata = "none"
+        # Katakana to Hiragana
         pronunciation_hira = jaconv.kata2hira(pronunciation_kata)
-        translation_kanji = english_to_japanese(word)
-        translation_hiragana = japanese_to_hiragana(translation_kanji)
-        worddict = {
+        translation_hiragana = lookup(
+            "hiragana", translation_kanji, japanese_to_hiragana
+        )
+        return {
             "Word": word,
             "Frequency": count,
             "Pronunciation (katakana)": pronunciation_kata,
@@ -214,31 +562,180 @@ def make_wordlist(words: list[tuple]) -> list[dict]:
             "Translation (kanji)": translation_kanji,
             "Translation (hiragana)": translation_hiragana,
         }
-        wordlist.append(worddict)
-    return wordlist
 
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(enrich, words[index], translation): index
+            for index, translation in zip(pending, translations)
+        }
+        # record words in the order they finish, and keep them in their original order
+        for future in as_completed(futures):
+            index = futures[future]
+            wordlist[index] = future.result()
+            if journal is not None:
+                journal.record_entry(index, wordlist[index])
+    return WordTable.from_records(wordlist)
+
+
+def make_wordlists(
+    grade_words: dict[str, list[tuple]],
+    cache: Optional[EnrichmentCache] = None,
+    translate_client: Optional[translate.Client] = None,
+    workers: int = 8,
+    web_fallback: bool = True,
+    offline_pronunciation: bool = False,
+    journal: Optional[Journal] = None,
+) -> dict[str, WordTable]:
+    """Make the wordlists of several grades together, looking up each distinct word
+    only once, however many of the grades it is in.
+
+    Args:
+        grade_words (dict[str, list[tuple]]): The words of each grade, as tuples of words and their frequencies.
+        cache (Optional[EnrichmentCache], optional): A cache of previous pronunciations and translations. Defaults to None.
+        translate_client (Optional[translate.Client], optional): The Translate client to use. Defaults to None, which uses the shared client.
+        workers (int, optional): The number of words to look up at once. Defaults to 8.
+        web_fallback (bool, optional): Whether to scrape the katakana for words which don't get it from the pronunciation dictionary. Defaults to True.
+        offline_pronunciation (bool, optional): Whether to write the katakana of words in the pronunciation dictionary with its rules. Defaults to False.
+        journal (Optional[Journal], optional): A journal to record each distinct word in as soon as it is done. Defaults to None.
 
-def write_gsheet(wordlist: list[dict], grade: str):
+    Returns:
+        dict[str, WordTable]: The wordlist of each grade, as from make_wordlist().
+    """
+    distinct = list(
+        dict.fromkeys(word for words in grade_words.values() for word, _ in words)
+    )
+    total = sum(len(words) for words in grade_words.values())
+    print(
+        f"Looking up {len(distinct)} distinct words for {total} entries "
+        f"across {len(grade_words)} grades ..."
+    )
+    enriched = {
+        entry["Word"]: entry
+        for entry in make_wordlist(
+            words=[(word, 0) for word in distinct],
+            cache=cache,
+            translate_client=translate_client,
+            workers=workers,
+            web_fallback=web_fallback,
+            offline_pronunciation=offline_pronunciation,
+            journal=journal,
+        )
+    }
+    # each word needs a pronunciation, a translation and a reading of the translation
+    print(f"Single pass saved {3 * (total - len(distinct))} lookups.")
+    return {
+        grade: WordTable.from_records(
+            {**enriched[word], "Frequency": count} for word, count in words
+        )
+        for grade, words in grade_words.items()
+    }
+
+
+def diff_ranges(old_values: list[list], new_values: list[list]) -> list[dict]:
+    """Find the rows of a worksheet which need to change, grouped into ranges of consecutive rows.
+
+    Args:
+        old_values (list[list]): The current contents of the worksheet, e.g. from get_all_values().
+        new_values (list[list]): The contents it should have.
+
+    Returns:
+        list[dict]: The ranges to write, in the form Worksheet.batch_update() takes. Rows no longer needed are blanked.
+    """
+    width = max(
+        [len(row) for row in old_values] + [len(row) for row in new_values] + [1]
+    )
+
+    def padded(rows, index):
+        row = rows[index] if index < len(rows) else []
+        # the sheet returns every value as a string
+        return [str(value) for value in row] + [""] * (width - len(row))
+
+    ranges = []
+    current = None
+    for index in range(max(len(old_values), len(new_values))):
+        new_row = padded(new_values, index)
+        if padded(old_values, index) == new_row:
+            current = None
+            continue
+        if current is None:
+            current = {"first": index + 1, "values": []}
+            ranges.append(current)
+        # write the whole width, so cells past the end of the new row are cleared,
+        #  but keep the values as they are, e.g. numbers as numbers
+        row = new_values[index] if index < len(new_values) else []
+        current["values"].append(list(row) + [""] * (width - len(row)))
+    return [
+        {
+            "range": f"A{found['first']}:"
+            + gspread.utils.rowcol_to_a1(
+                found["first"] + len(found["values"]) - 1, width
+            ),
+            "values": found["values"],
+        }
+        for found in ranges
+    ]
+
+
+def write_worksheet(worksheet: gspread.models.Worksheet, wordlist: WordTable):
+    """Write a list of words to an empty worksheet, header and all, in one request.
+
+    Args:
+        worksheet (gspread.models.Worksheet): The worksheet to write to.
+        wordlist (WordTable): A list of words, with fields like pronunciation and translation.
+    """
+    worksheet.update("A1", wordlist.to_values())
+
+
+def update_worksheet(worksheet: gspread.models.Worksheet, wordlist: WordTable) -> int:
+    """Bring a worksheet up to date with a list of words, only writing the rows which changed.
+
+    Args:
+        worksheet (gspread.models.Worksheet): The worksheet to update.
+        wordlist (WordTable): A list of words, with fields like pronunciation and translation.
+
+    Returns:
+        int: The number of rows written.
+    """
+    new_values = wordlist.to_values()
+    ranges = diff_ranges(worksheet.get_all_values(), new_values)
+    if not ranges:
+        return 0
+    if (
+        len(new_values) > worksheet.row_count
+        or len(new_values[0]) > worksheet.col_count
+    ):
+        worksheet.resize(
+            rows=max(len(new_values), worksheet.row_count),
+            cols=max(len(new_values[0]), worksheet.col_count),
+        )
+    worksheet.batch_update(ranges)
+    return sum(len(found["values"]) for found in ranges)
+
+
+def write_gsheet(wordlist: WordTable, grade: str, incremental: bool = False):
     """Create a worksheet within a Google Sheets document and write to it a list of words and their pronunciations and translations. Any existing worksheet with the same name will first be backed up.
 
     Args:
-        wordlist (list[dict]): A list of words, which are each a dictionary containing the fields like pronunciation and translation.
+        wordlist (WordTable): A list of words, with fields like pronunciation and translation.
         grade (str): The grade level of the word list.
+        incremental (bool, optional): Whether to update an existing worksheet in place, only writing the rows which changed, instead of backing it up and writing a new one. Defaults to False.
     """
     # sheetname = "Eiken Vocabulary"
     sheetname = "Eiken Vocabulary (testing)"
     max_rows = len(wordlist) + 10
-    max_cols = len(wordlist[0]) + 2
-    credsfile = Path(__file__).parent.parent.resolve() / "creds.json"
-    scope = [
-        "https://spreadsheets.google.com/feeds",
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive.file",
-        "https://www.googleapis.com/auth/drive",
-    ]
-    creds = ServiceAccountCredentials.from_json_keyfile_name(credsfile, scope)
-    client = gspread.authorize(creds)
+    max_cols = len(wordlist.columns) + 2
+    # one client for every grade, whose requests are spaced out within the quotas
+    client = googleapi.get_client()
     vocabsheet = client.open(sheetname)
+    if incremental:
+        try:
+            worksheet = vocabsheet.worksheet(title=f"grade_{grade}")
+        except gspread.exceptions.WorksheetNotFound:
+            pass
+        else:
+            rows = update_worksheet(worksheet, wordlist)
+            print(f"Updated {rows} rows of the Grade {grade} sheet.")
+            return
     try:
         worksheet = vocabsheet.add_worksheet(
             title=f"grade_{grade}", rows=max_rows, cols=max_cols, index=0
@@ -260,23 +757,35 @@ def write_gsheet(wordlist: list[dict], grade: str):
             title=f"grade_{grade}", rows=max_rows, cols=max_cols, index=0
         )
         print(f"Successfully added Grade {grade} sheet.")
-    # Use the dictionary keys to create the header row
-    for index, key in enumerate(wordlist[0]):
-        worksheet.update_cell(row=1, col=index + 1, value=key)
-    worksheet.format("1", {"textFormat": {"bold": True}, "wrapStrategy": "WRAP"})
-    worksheet.freeze(rows=1)
-
-    # use a list to contain gspread Cell objects, which can be batch written
-    cells = []
-    row = 2
-    for word in wordlist:
-        column = 1
-        for value in word.values():
-            # print(f"Row: {row}, Column: {column}, Value: {value}")
-            # print(type(value))
-            cells.append(Cell(row=row, col=column, value=value))
-            # worksheet.update_cell(row, column, value)
-            column += 1
-        row += 1
-    # write in a batch
-    worksheet.update_cells(cells)
+    # write the header row and every word in a single batch
+    write_worksheet(worksheet, wordlist)
+    # then make the header row bold and keep it in view, together in one request
+    vocabsheet.batch_update(
+        {
+            "requests": [
+                {
+                    "repeatCell": {
+                        "range": gspread.utils.a1_range_to_grid_range(
+                            "1", worksheet.id
+                        ),
+                        "cell": {
+                            "userEnteredFormat": {
+                                "textFormat": {"bold": True},
+                                "wrapStrategy": "WRAP",
+                            }
+                        },
+                        "fields": "userEnteredFormat(textFormat,wrapStrategy)",
+                    }
+                },
+                {
+                    "updateSheetProperties": {
+                        "properties": {
+                            "sheetId": worksheet.id,
+                            "gridProperties": {"frozenRowCount": 1},
+                        },
+                        "fields": "gridProperties/frozenRowCount",
+                    }
+                },
+            ]
+        }
+    )
@@ -0,0 +1,277 @@
+# standard library imports
+from pathlib import Path
+from array import array
+import json
+import re
+import struct
+from typing import Iterable, Iterator, Optional
+
+# local imports
+from atomicfile import atomic_write
+
+# A saved table starts with a magic number and the length of its JSON header
+MAGIC = b"EVTABLE1"
+HEADER = struct.Struct("=8sI")
+# Blanks in example sentences, e.g. "I ___ to school", and how the cards show them
+BLANK_REGEX = re.compile(r"([_])\w+")
+BLANK_HTML = '<span class="blank">____</span>'
+# Joins a column's values into one string, so it can be searched in one pass
+SEPARATOR = "\x00"
+# The data path makelists reads the tests from, and saves each grade's wordlist in
+DEFAULT_DATAPATH = Path(__file__).parent.parent.resolve() / "data"
+
+
+class WordTable:
+    """A list of words and their fields (pronunciation, translation, etc.), stored
+    as one list per field instead of one dictionary per word.
+
+    Tables are treated as immutable: methods which change a table return a new
+    one, sharing the columns they don't change.
+    """
+
+    __slots__ = ("_columns",)
+
+    def __init__(self, columns: Optional[dict[str, list]] = None):
+        """
+        Args:
+            columns (Optional[dict[str, list]], optional): The values of each field, in order, all the same length. Defaults to None, which makes an empty table.
+        """
+        columns = dict(columns or {})
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("Every column of a WordTable must be the same length.")
+        self._columns = columns
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict]) -> "WordTable":
+        """Make a table from a dictionary per word, e.g. from wordlists.make_wordlist().
+
+        Args:
+            records (Iterable[dict]): The fields of each word. The first word's keys name the columns.
+
+        Returns:
+            WordTable: The table.
+        """
+        records = list(records)
+        if not records:
+            return cls()
+        return cls({name: [record[name] for record in records] for name in records[0]})
+
+    @classmethod
+    def from_values(cls, values: list[list]) -> "WordTable":
+        """Make a table from the contents of a worksheet, without changing them.
+
+        Args:
+            values (list[list]): The rows of the worksheet, with a header row first.
+
+        Returns:
+            WordTable: The table.
+        """
+        if not values:
+            return cls()
+        header, rows = values[0], values[1:]
+        return cls(
+            {
+                name: [row[index] if index < len(row) else "" for row in rows]
+                for index, name in enumerate(header)
+            }
+        )
+
+    @property
+    def columns(self) -> list[str]:
+        return list(self._columns)
+
+    def column(self, name: str) -> list:
+        """Get the values of a field.
+
+        Args:
+            name (str): The name of the field, e.g. "Word".
+
+        Returns:
+            list: The value for each word.
+        """
+        return self._columns[name]
+
+    def __len__(self) -> int:
+        for values in self._columns.values():
+            return len(values)
+        return 0
+
+    def __getitem__(self, index: int) -> dict:
+        return {name: values[index] for name, values in self._columns.items()}
+
+    def __iter__(self) -> Iterator[dict]:
+        names = list(self._columns)
+        for row in zip(*self._columns.values()):
+            yield dict(zip(names, row))
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, WordTable):
+            return NotImplemented
+        return self._columns == other._columns
+
+    def records(self) -> list[dict]:
+        """Get a dictionary per word, e.g. for the flashcard template.
+
+        Returns:
+            list[dict]: The fields of each word.
+        """
+        return list(self)
+
+    def to_values(self) -> list[list]:
+        """Lay out the table as the rows of a worksheet.
+
+        Returns:
+            list[list]: The header row, followed by one row per word.
+        """
+        return [self.columns] + [list(row) for row in zip(*self._columns.values())]
+
+    def with_column(self, name: str, values: list, first: bool = False) -> "WordTable":
+        """Add a field to every word, or replace it.
+
+        Args:
+            name (str): The name of the field.
+            values (list): The value for each word.
+            first (bool, optional): Whether to put the new field before the others. Defaults to False, which puts it last.
+
+        Returns:
+            WordTable: A new table with the field.
+        """
+        columns = {name: values} if first else {}
+        columns.update(
+            (other, column) for other, column in self._columns.items() if other != name
+        )
+        columns[name] = list(values)
+        return WordTable(columns)
+
+    def with_ids(self, start: int = 1) -> "WordTable":
+        """Number the words, as the first field, "ID".
+
+        Args:
+            start (int, optional): The first word's number. Defaults to 1.
+
+        Returns:
+            WordTable: A new table with the numbers.
+        """
+        return self.with_column("ID", list(range(start, start + len(self))), first=True)
+
+    def replace_blanks(self) -> "WordTable":
+        """Replace the blanks in every text field with ones that work in the flashcard template.
+
+        Returns:
+            WordTable: A new table with the blanks replaced.
+        """
+        columns = {}
+        for name, values in self._columns.items():
+            if values and all(isinstance(value, str) for value in values):
+                joined = SEPARATOR.join(values)
+                # the separator can't be part of a blank, so each column is one search,
+                #  and columns without any blanks keep their values as they are
+                if "_" in joined and joined.count(SEPARATOR) == len(values) - 1:
+                    values = BLANK_REGEX.sub(BLANK_HTML, joined).split(SEPARATOR)
+                elif "_" in joined:
+                    values = [BLANK_REGEX.sub(BLANK_HTML, value) for value in values]
+            elif any(isinstance(value, str) for value in values):
+                values = [
+                    (
+                        BLANK_REGEX.sub(BLANK_HTML, value)
+                        if isinstance(value, str)
+                        else value
+                    )
+                    for value in values
+                ]
+            columns[name] = values
+        return WordTable(columns)
+
+    def save(self, filename: str):
+        """Save the table to a binary file, column by column.
+
+        After the header, which lists each column's name, type and size, each text
+        column is stored as the offsets of its values followed by their UTF-8 bytes,
+        and each number column as 64-bit integers. The header also lists which
+        values of a column are None, which are stored as "" or 0.
+
+        Args:
+            filename (str): The file to write.
+        """
+        blobs = []
+        described = []
+        for name, values in self._columns.items():
+            nulls = [index for index, value in enumerate(values) if value is None]
+            if all(value is None or isinstance(value, int) for value in values):
+                blob = array("q", [value or 0 for value in values]).tobytes()
+                kind = "int"
+            else:
+                encoded = [
+                    b"" if value is None else str(value).encode("utf-8")
+                    for value in values
+                ]
+                offsets = array("Q", [0])
+                for value in encoded:
+                    offsets.append(offsets[-1] + len(value))
+                blob = offsets.tobytes() + b"".join(encoded)
+                kind = "str"
+            column = {"name": name, "type": kind, "size": len(blob)}
+            if nulls:
+                column["nulls"] = nulls
+            described.append(column)
+            blobs.append(blob)
+        header = json.dumps({"rows": len(self), "columns": described}).encode("utf-8")
+        with atomic_write(filename) as f:
+            f.write(HEADER.pack(MAGIC, len(header)))
+            f.write(header)
+            for blob in blobs:
+                f.write(blob)
+
+    @classmethod
+    def load(cls, filename: str) -> "WordTable":
+        """Load a table saved by save().
+
+        Args:
+            filename (str): The file to read.
+
+        Raises:
+            ValueError: If the file isn't a saved table.
+
+        Returns:
+            WordTable: The table.
+        """
+        data = Path(filename).read_bytes()
+        magic, header_size = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"{filename} isn't a saved WordTable.")
+        position = HEADER.size
+        header = json.loads(data[position : position + header_size])
+        position += header_size
+        rows = header["rows"]
+        columns = {}
+        for described in header["columns"]:
+            blob = memoryview(data)[position : position + described["size"]]
+            position += described["size"]
+            if described["type"] == "int":
+                values = blob.cast("q").tolist()
+            else:
+                offsets = blob[: (rows + 1) * 8].cast("Q")
+                text = bytes(blob[(rows + 1) * 8 :])
+                values = [
+                    text[offsets[index] : offsets[index + 1]].decode("utf-8")
+                    for index in range(rows)
+                ]
+            for index in described.get("nulls", ()):
+                values[index] = None
+            columns[described["name"]] = values
+        return cls(columns)
+
+
+def table_file(grade: str, datapath: str = DEFAULT_DATAPATH) -> Path:
+    """Get where a grade's wordlist is saved locally, in the "wordlists" folder of
+    the data path.
+
+    Args:
+        grade (str): The grade level.
+        datapath (str, optional): The data path given to makelists. Defaults to DEFAULT_DATAPATH.
+
+    Returns:
+        Path: The file.
+    """
+    return Path(datapath).resolve() / "wordlists" / f"grade_{grade}.wordtable"
@@ -0,0 +1,32 @@
+"""Tests for saving and loading a WordTable.
+
+python -m pytest tests
+"""
+
+# standard library imports
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent.resolve() / "eikenvocab"))
+
+# local imports
+from wordtable import WordTable
+
+
+def test_save_and_load(tmp_path):
+    wordlist = WordTable(
+        {
+            "id": [1, 2, 3],
+            "word": ["go", "child", "study"],
+            "pronunciation": ["ゴー", None, ""],
+            "frequency": [12, None, 0],
+            "notes": [None, None, None],
+        }
+    )
+    filename = tmp_path / "grade_5.wordtable"
+    wordlist.save(filename)
+    loaded = WordTable.load(filename)
+    assert loaded == wordlist
+    assert loaded.column("pronunciation") == ["ゴー", None, ""]
+    assert loaded.column("frequency") == [12, None, 0]
+    assert loaded.column("notes") == [None, None, None]